@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+
+"""
+Benchmark every implementation registered in a puzzle's test cases, via the
+`impl` class attribute, over a series of generated input sizes. Reports the
+time taken and the peak memory allocated per implementation and size.
+
+Each module argument is a puzzle file path, or a name from `WORKLOADS`.
+"""
+
+from collections import deque
+from dataclasses import dataclass
+from types import ModuleType
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, \
+    Tuple
+import argparse
+import importlib.util
+import os
+import random
+import string
+import time
+import tracemalloc
+import unittest
+
+
+PUZZLES_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+@dataclass
+class Workload:
+    path: str
+    sizes: Sequence[int]
+    make_args: Callable[[int], Tuple[Any, ...]]
+
+    # Only these test cases' implementations, if given, for modules with
+    # implementations taking different arguments.
+    impl_names: Optional[Sequence[str]] = None
+
+
+@dataclass
+class Measurement:
+    impl_name: str
+    size: int
+    seconds: Optional[float] = None
+    peak_bytes: Optional[int] = None
+    error: Optional[str] = None
+
+
+def make_word(size: int, rand: random.Random) -> str:
+    return ''.join(rand.choices(string.ascii_lowercase, k=size))
+
+
+def make_anagram_args(size: int) -> Tuple[str, str]:
+    rand = random.Random(size)
+    word = make_word(size, rand)
+    letters = list(word)
+    rand.shuffle(letters)
+    return (word, ''.join(letters))
+
+
+def make_anagram_bulk_args(size: int) -> Tuple[List[str], List[str]]:
+    """
+    Batch of `size` word pairs, half of them anagrams.
+    """
+
+    rand = random.Random(size)
+    words_1 = [make_word(rand.randint(1, 12), rand) for _ in range(size)]
+    words_2 = [''.join(rand.sample(word, len(word))) if i % 2 == 0
+        else make_word(len(word), rand)
+        for i, word in enumerate(words_1)]
+
+    return (words_1, words_2)
+
+
+def make_char_set_args(size: int) -> Tuple[str, str]:
+    rand = random.Random(size)
+    return (make_word(size, rand), make_word(size, rand))
+
+
+def make_history_args(size: int) -> Tuple[List[str], List[str]]:
+    """
+    Two histories sharing the same URLs, rotated by half, so there are two
+    long common runs: the worst case for rescanning from every start.
+    """
+
+    urls = ['/%d' % i for i in range(size)]
+    return (urls, urls[size // 2:] + urls[:size // 2])
+
+
+WORKLOADS: Dict[str, Workload] = {
+    'anagram': Workload(
+        path=os.path.join('strings', 'anagram.py'),
+        sizes=[10, 100, 1_000, 10_000, 100_000],
+        make_args=make_anagram_args,
+        impl_names=[
+            'TestCaseBySorting',
+            'TestCaseBySplicingRecur',
+            'TestCaseBySplicingIter',
+            'TestCaseByHistogram',
+        ]),
+    'anagram_bulk': Workload(
+        path=os.path.join('strings', 'anagram.py'),
+        sizes=[10, 100, 1_000, 10_000, 100_000, 1_000_000],
+        make_args=make_anagram_bulk_args,
+        impl_names=['TestCaseBulk']),
+    'char_set_same': Workload(
+        path=os.path.join('strings', 'char_set_same.py'),
+        sizes=[10, 100, 1_000, 10_000, 100_000],
+        make_args=make_char_set_args),
+    'balanced_parens_combine': Workload(
+        path=os.path.join('strings', 'balanced_parens_combine.py'),
+        sizes=[2, 4, 6, 8, 10, 12],
+        make_args=lambda size: (size,)),
+    'find_longest_common_history': Workload(
+        path=os.path.join('to-do', 'find_longest_common_history.py'),
+        sizes=[10, 100, 1_000, 10_000, 100_000, 1_000_000],
+        make_args=make_history_args),
+}
+
+
+def load_module(path: str) -> ModuleType:
+    """
+    Imports a puzzle file by path, since puzzle directories aren't packages.
+    """
+
+    name = os.path.splitext(os.path.basename(path))[0]
+    spec = importlib.util.spec_from_file_location(name, path)
+
+    if (spec is None) or (spec.loader is None):
+        raise ImportError('Unable to load module: %s' % path)
+
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def find_impls(
+        module: ModuleType,
+        impl_names: Optional[Sequence[str]] = None) -> Dict[str, Callable]:
+
+    """
+    Finds every implementation registered via a test case `impl` attribute,
+    keyed by the test case name, optionally only for the given test cases.
+    """
+
+    impls: Dict[str, Callable] = {}
+
+    for name, value in vars(module).items():
+        if not isinstance(value, type):
+            continue
+        if not issubclass(value, unittest.TestCase):
+            continue
+        if (impl_names is not None) and (name not in impl_names):
+            continue
+
+        impl = getattr(value, 'impl', None)
+
+        if impl is not None:
+            impls[name] = impl
+
+    return impls
+
+
+def call(impl: Callable, args: Tuple[Any, ...]) -> Any:
+    """
+    Calls an implementation, fully consuming it if it's a lazy iterator.
+    """
+
+    result = impl(*args)
+
+    if isinstance(result, Iterator):
+        deque(result, maxlen=0)
+
+    return result
+
+
+def measure(impl: Callable, args: Tuple[Any, ...]) -> Tuple[float, int]:
+    """
+    Time and peak memory are measured in separate calls, so that tracing
+    memory allocations doesn't skew timing.
+    """
+
+    start = time.perf_counter()
+    call(impl, args)
+    seconds = time.perf_counter() - start
+
+    tracemalloc.start()
+
+    try:
+        call(impl, args)
+        (_, peak_bytes) = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return (seconds, peak_bytes)
+
+
+def run_workload(
+        workload: Workload,
+        impls: Dict[str, Callable],
+        max_seconds: float) -> Iterator[Measurement]:
+
+    """
+    Stops measuring an implementation at larger sizes once it either fails or
+    exceeds `max_seconds` for a single call.
+    """
+
+    stopped = set()
+
+    for size in workload.sizes:
+        args = workload.make_args(size)
+
+        for impl_name, impl in impls.items():
+            if impl_name in stopped:
+                continue
+
+            try:
+                (seconds, peak_bytes) = measure(impl, args)
+            except RecursionError:
+                stopped.add(impl_name)
+                yield Measurement(impl_name, size, error='recursion limit')
+                continue
+            except ImportError as error:
+                stopped.add(impl_name)
+                yield Measurement(impl_name, size, error=str(error))
+                continue
+
+            if seconds > max_seconds:
+                stopped.add(impl_name)
+
+            yield Measurement(impl_name, size, seconds, peak_bytes)
+
+
+def format_measurement(measurement: Measurement) -> str:
+    if measurement.error is not None:
+        result = measurement.error
+    else:
+        assert measurement.seconds is not None
+        assert measurement.peak_bytes is not None
+        result = '%12.3f ms %12.1f KiB' % (
+            measurement.seconds * 1000, measurement.peak_bytes / 1024)
+
+    return '%10d  %-32s %s' % (
+        measurement.size, measurement.impl_name, result)
+
+
+def parse_workloads(modules: List[str]) -> Dict[str, Workload]:
+    if len(modules) == 0:
+        return WORKLOADS
+
+    workloads = {}
+
+    for module in modules:
+        name = os.path.splitext(os.path.basename(module))[0]
+
+        if name not in WORKLOADS:
+            raise SystemExit('No workload defined for module: %s' % module)
+
+        workloads[name] = WORKLOADS[name]
+
+    return workloads
+
+
+class Test (unittest.TestCase):
+    def load_workload_module(self, name: str) -> ModuleType:
+        return load_module(os.path.join(PUZZLES_DIR, WORKLOADS[name].path))
+
+    def test_find_impls(self):
+        module = self.load_workload_module('anagram')
+
+        self.assertLessEqual({
+            'TestCaseBySorting',
+            'TestCaseBySplicingRecur',
+            'TestCaseBySplicingIter',
+            'TestCaseByHistogram',
+        }, set(find_impls(module)))
+
+    def test_workload_args_are_valid(self):
+        for name, workload in WORKLOADS.items():
+            module = self.load_workload_module(name)
+
+            impls = find_impls(module, workload.impl_names)
+            self.assertNotEqual(impls, {})
+
+            for impl_name, impl in impls.items():
+                with self.subTest(impl_name):
+                    call(impl, workload.make_args(workload.sizes[0]))
+
+    def test_anagram_args_are_anagrams(self):
+        module = self.load_workload_module('anagram')
+        self.assertTrue(module.is_anagram_by_sorting(*make_anagram_args(50)))
+
+    def test_run_workload(self):
+        workload = Workload(path='', sizes=[1, 2], make_args=lambda n: (n,))
+        impls = {'identity': lambda n: n}
+        measurements = list(run_workload(workload, impls, max_seconds=1))
+
+        self.assertEqual([m.size for m in measurements], [1, 2])
+
+        for measurement in measurements:
+            self.assertIsNone(measurement.error)
+            self.assertGreaterEqual(measurement.seconds, 0)
+
+    def test_run_workload_stops_on_recursion_error(self):
+        def recur(n):
+            return recur(n)
+
+        workload = Workload(path='', sizes=[1, 2], make_args=lambda n: (n,))
+        measurements = list(run_workload(workload, {'recur': recur}, 1))
+
+        self.assertEqual(len(measurements), 1)
+        self.assertEqual(measurements[0].error, 'recursion limit')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('modules', nargs='*', metavar='MODULE')
+    parser.add_argument('--max-seconds', type=float, default=1.0)
+    args = parser.parse_args()
+
+    for name, workload in parse_workloads(args.modules).items():
+        module = load_module(os.path.join(PUZZLES_DIR, workload.path))
+        print('%s:' % name)
+
+        for measurement in run_workload(
+                workload,
+                find_impls(module, workload.impl_names),
+                args.max_seconds):
+            print(format_measurement(measurement), flush=True)
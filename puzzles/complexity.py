@@ -0,0 +1,488 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+
+"""
+Empirically check the `Time:` and `Space:` complexity claims documented in
+puzzle docstrings. Each target function is run over growing input sizes, its
+measured time and peak memory are fitted on a log-log scale, and the fitted
+growth is compared against the claimed one.
+
+Claims are read from the function docstring, or from the module docstring
+when the function doesn't have any. Only functions with a workload defined in
+`TARGETS` are measured.
+"""
+
+from dataclasses import dataclass
+from types import ModuleType
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, \
+    Tuple
+import argparse
+import math
+import os
+import random
+import re
+import time
+import tracemalloc
+import unittest
+
+from benchmark import PUZZLES_DIR, load_module, make_anagram_args, \
+    make_char_set_args, make_word
+
+
+Thunk = Callable[[], Any]
+
+
+@dataclass(frozen=True)
+class Growth:
+    """
+    Dominant term of a complexity claim, `n^degree * (log n)^log_power`,
+    unless it's exponential or factorial.
+    """
+
+    degree: int = 0
+    log_power: int = 0
+    exponential: bool = False
+    factorial: bool = False
+
+    def log_value(self, n: float) -> float:
+        if self.factorial:
+            return math.lgamma(n + 1)
+        if self.exponential:
+            return n * math.log(2)
+
+        return (self.degree * math.log(n)) \
+            + (self.log_power * math.log(math.log(n)))
+
+    def __str__(self) -> str:
+        if self.factorial:
+            return 'O(n!)'
+        if self.exponential:
+            return 'O(2^n)'
+
+        terms = []
+
+        if self.degree == 1:
+            terms.append('n')
+        elif self.degree > 1:
+            terms.append('n^%d' % self.degree)
+
+        if self.log_power == 1:
+            terms.append('log n')
+        elif self.log_power > 1:
+            terms.append('log^%d n' % self.log_power)
+
+        return 'O(%s)' % (' '.join(terms) or '1')
+
+
+CANDIDATE_GROWTHS = [
+    Growth(),
+    Growth(log_power=1),
+    Growth(degree=1),
+    Growth(degree=1, log_power=1),
+    Growth(degree=2),
+    Growth(degree=3),
+    Growth(exponential=True),
+    Growth(factorial=True),
+]
+
+
+@dataclass
+class Target:
+    path: str
+    name: str
+    sizes: Sequence[int]
+    setup: Callable[[Any, int], Thunk]
+
+
+@dataclass
+class Check:
+    target: Target
+    kind: str
+    claim: str
+    claimed_slope: float
+    measured_slope: float
+    best_fit: Growth
+    status: str
+
+
+def parse_claims(doc: Optional[str]) -> Dict[str, str]:
+    """
+    Finds `Time: O(...)` and `Space: O(...)` claims, allowing for
+    reStructuredText markup around them, and nested parenthesis inside.
+    """
+
+    claims: Dict[str, str] = {}
+
+    if doc is None:
+        return claims
+
+    for match in re.finditer(r'(Time|Space):\**\s*`*O\(', doc):
+        depth = 1
+        end = match.end()
+
+        while (end < len(doc)) and (depth > 0):
+            if doc[end] == '(':
+                depth += 1
+            elif doc[end] == ')':
+                depth -= 1
+            end += 1
+
+        if depth == 0:
+            claims.setdefault(match.group(1), doc[match.end():end - 1].strip())
+
+    return claims
+
+
+def parse_growth(expr: str) -> Growth:
+    """
+    Keeps only the dominant additive term, treating every variable as the
+    same input size `n`, eg. `n+m` is `O(n)` and `m * n` is `O(n^2)`.
+    """
+
+    expr = re.sub(r'\s+', '', expr.lower()).replace('max(', '(')
+    expr = expr.replace('(', '').replace(')', '')
+    terms = []
+
+    for term in re.split(r'[+,]', expr):
+        degree = 0
+        log_power = 0
+        exponential = False
+        factorial = False
+
+        for token in re.findall(
+                r'log[a-z]|\d+\^[a-z]|[a-z]!|[a-z]\^\d+|[a-z]|\d+', term):
+
+            if token.startswith('log'):
+                log_power += 1
+            elif re.fullmatch(r'\d+\^[a-z]', token):
+                exponential = True
+            elif token.endswith('!'):
+                factorial = True
+            elif '^' in token:
+                degree += int(token.split('^')[1])
+            elif token.isalpha():
+                degree += 1
+
+        terms.append(Growth(degree, log_power, exponential, factorial))
+
+    return max(terms, key=lambda growth: (
+        growth.factorial, growth.exponential, growth.degree, growth.log_power))
+
+
+def fit_slope(xs: Sequence[float], ys: Sequence[float]) -> float:
+    """
+    Least-squares slope of `ys` over `xs`.
+    """
+
+    mean_x = sum(xs) / len(xs)
+    mean_y = sum(ys) / len(ys)
+    covariance = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys))
+    variance = sum((x - mean_x) ** 2 for x in xs)
+
+    return covariance / variance
+
+
+def fit_growth(sizes: Sequence[int], values: Sequence[float]) -> Growth:
+    """
+    Picks the candidate growth whose log-scale shape best matches the
+    measured values, up to a constant factor.
+    """
+
+    log_values = [math.log(max(value, 1e-9)) for value in values]
+    best_fit = CANDIDATE_GROWTHS[0]
+    best_error = math.inf
+
+    for growth in CANDIDATE_GROWTHS:
+        residuals = [log_value - growth.log_value(size)
+            for size, log_value in zip(sizes, log_values)]
+        mean = sum(residuals) / len(residuals)
+        error = sum((residual - mean) ** 2 for residual in residuals)
+
+        if error < best_error:
+            best_fit = growth
+            best_error = error
+
+    return best_fit
+
+
+def compare(
+        claimed: Growth,
+        sizes: Sequence[int],
+        values: Sequence[float],
+        tolerance: float) -> Tuple[float, float, str]:
+
+    """
+    Compares log-log slopes over the measured sizes, since for a fixed range
+    of sizes any growth (even exponential) has an effective polynomial degree.
+    """
+
+    log_sizes = [math.log(size) for size in sizes]
+    claimed_slope = fit_slope(
+        log_sizes, [claimed.log_value(size) for size in sizes])
+    measured_slope = fit_slope(
+        log_sizes, [math.log(max(value, 1e-9)) for value in values])
+
+    if measured_slope > (claimed_slope + tolerance):
+        status = 'WORSE'
+    elif measured_slope < (claimed_slope - tolerance):
+        status = 'better'
+    else:
+        status = 'ok'
+
+    return (claimed_slope, measured_slope, status)
+
+
+def measure(setup: Callable[[], Thunk], repeat: int) -> Tuple[float, int]:
+    """
+    Best time out of `repeat` calls, and the peak memory of one more call,
+    each on a freshly set-up thunk so that mutating targets start equal.
+    """
+
+    best_seconds = math.inf
+
+    for _ in range(repeat):
+        thunk = setup()
+        start = time.perf_counter()
+        thunk()
+        best_seconds = min(best_seconds, time.perf_counter() - start)
+
+    thunk = setup()
+    tracemalloc.start()
+
+    try:
+        thunk()
+        (_, peak_bytes) = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return (best_seconds, peak_bytes)
+
+
+def resolve(module: ModuleType, name: str) -> Any:
+    obj: Any = module
+
+    for attr in name.split('.'):
+        obj = getattr(obj, attr)
+
+    return obj
+
+
+def check_target(
+        target: Target,
+        repeat: int,
+        tolerance: float) -> Iterator[Check]:
+
+    module = load_module(os.path.join(PUZZLES_DIR, target.path))
+    claims = parse_claims(resolve(module, target.name).__doc__) \
+        or parse_claims(module.__doc__)
+
+    if len(claims) == 0:
+        return
+
+    seconds = []
+    peak_bytes = []
+
+    for size in target.sizes:
+        measurement = measure(lambda: target.setup(module, size), repeat)
+        seconds.append(measurement[0])
+        peak_bytes.append(max(measurement[1], 1))
+
+    for kind, values in [('Time', seconds), ('Space', peak_bytes)]:
+        if kind not in claims:
+            continue
+
+        claim = 'O(%s)' % claims[kind]
+        (claimed_slope, measured_slope, status) = compare(
+            parse_growth(claims[kind]), target.sizes, values, tolerance)
+
+        yield Check(target, kind, claim, claimed_slope, measured_slope,
+            fit_growth(target.sizes, values), status)
+
+
+def setup_call(name: str, make_args: Callable[[int], Tuple]) \
+        -> Callable[[Any, int], Thunk]:
+
+    def setup(module: ModuleType, size: int) -> Thunk:
+        func = resolve(module, name)
+        args = make_args(size)
+        return lambda: func(*args)
+
+    return setup
+
+
+def setup_stacks_push(module: ModuleType, size: int) -> Thunk:
+    """
+    Fills all but the last array slot, so that pushing has to find it.
+    """
+
+    stacks = module.Stacks(size)
+
+    for node in stacks._array[:-1]:
+        node.is_empty = False
+
+    return lambda: stacks.push(0, 'value')
+
+
+def make_parens_args(size: int) -> Tuple[str]:
+    return ('(' * (size // 2) + ')' * (size // 2),)
+
+
+def make_delims_args(size: int) -> Tuple[str]:
+    return ('([{' * (size // 6) + '}])' * (size // 6),)
+
+
+def make_history_args(size: int) -> Tuple[List[str], List[str]]:
+    urls = ['/%d' % i for i in range(size)]
+    return (urls, urls)
+
+
+def make_interleave_args(size: int) -> Tuple[str, str]:
+    rand = random.Random(size)
+    return (make_word(size, rand), make_word(size, rand))
+
+
+def make_celebrity_args(size: int) -> Tuple[List[int], Callable]:
+    return (list(range(size)), lambda person, other: False)
+
+
+LINEAR_SIZES = [20_000, 40_000, 80_000, 160_000, 320_000]
+QUADRATIC_SIZES = [250, 500, 1_000, 2_000, 4_000]
+
+TARGETS: List[Target] = [
+    Target(os.path.join('strings', 'anagram.py'), 'is_anagram_by_sorting',
+        LINEAR_SIZES, setup_call('is_anagram_by_sorting', make_anagram_args)),
+    Target(os.path.join('strings', 'anagram.py'), 'is_anagram_by_splicing_iter',
+        [8_000, 16_000, 32_000, 64_000],
+        setup_call('is_anagram_by_splicing_iter', make_anagram_args)),
+    Target(os.path.join('strings', 'anagram.py'), 'is_anagram_by_histogram',
+        LINEAR_SIZES,
+        setup_call('is_anagram_by_histogram', make_anagram_args)),
+    Target(os.path.join('strings', 'char_set_same.py'),
+        'has_same_char_set_by_set_cmp', LINEAR_SIZES,
+        setup_call('has_same_char_set_by_set_cmp', make_char_set_args)),
+    Target(os.path.join('strings', 'char_set_same.py'),
+        'has_same_char_set_by_set_cmp_partial', LINEAR_SIZES,
+        setup_call('has_same_char_set_by_set_cmp_partial', make_char_set_args)),
+    Target(os.path.join('strings', 'balanced_parens.py'), 'is_balanced',
+        LINEAR_SIZES, setup_call('is_balanced', make_parens_args)),
+    Target(os.path.join('strings', 'balanced_delims.py'), 'is_balanced',
+        LINEAR_SIZES, setup_call('is_balanced', make_delims_args)),
+    Target(os.path.join('strings', 'balanced_parens_combine.py'), 'permute',
+        [6, 7, 8, 9, 10, 11], setup_call('permute', lambda size: (size,))),
+    Target(os.path.join('to-do', 'interleave_strings.py'), 'interleave',
+        [3, 4, 5, 6, 7, 8], setup_call('interleave', make_interleave_args)),
+    Target(os.path.join('to-do', 'power_set.py'), 'generate',
+        [8, 10, 12, 14, 16],
+        setup_call('generate', lambda size: (list(range(size)),))),
+    Target(os.path.join('to-do', 'stacks_in_array.py'), 'Stacks.push',
+        LINEAR_SIZES, setup_stacks_push),
+    Target(os.path.join('to-do', 'find_longest_common_history.py'),
+        'find_contiguous_history_by_rescan', QUADRATIC_SIZES,
+        setup_call('find_contiguous_history_by_rescan', make_history_args)),
+    Target(os.path.join('to-do', 'find_longest_common_history.py'),
+        'find_contiguous_history_by_offset', LINEAR_SIZES,
+        setup_call('find_contiguous_history_by_offset', make_history_args)),
+    Target(os.path.join('to-do', 'find_celebrity.py'),
+        'find_celebrity_simple', QUADRATIC_SIZES,
+        setup_call('find_celebrity_simple', make_celebrity_args)),
+]
+
+
+def format_check(check: Check) -> str:
+    return '%-6s %-60s %-5s %-14s claimed %5.2f measured %5.2f (~%s)' % (
+        check.status,
+        '%s:%s' % (check.target.path, check.target.name),
+        check.kind,
+        check.claim,
+        check.claimed_slope,
+        check.measured_slope,
+        check.best_fit)
+
+
+class Test (unittest.TestCase):
+    def test_parse_plain_claims(self):
+        self.assertEqual(
+            parse_claims("""
+                Time: O(n), where n=string length
+                Space: O(1)
+            """),
+            {'Time': 'n', 'Space': '1'})
+
+    def test_parse_markup_claims(self):
+        self.assertEqual(
+            parse_claims("""
+                - **Time:** ``O(n log n )``
+                - **Space:** ``O(max(m, n))`` -- sorting is not in-place
+            """),
+            {'Time': 'n log n', 'Space': 'max(m, n)'})
+
+    def test_parse_no_claims(self):
+        self.assertEqual(parse_claims(None), {})
+        self.assertEqual(parse_claims('Space: ditto'), {})
+
+    def test_parse_growth(self):
+        cases = {
+            '1': Growth(),
+            'log n': Growth(log_power=1),
+            'n+m': Growth(degree=1),
+            'max(m, n)': Growth(degree=1),
+            'n log n': Growth(degree=1, log_power=1),
+            'm * n': Growth(degree=2),
+            'n^2': Growth(degree=2),
+            '2^n': Growth(exponential=True),
+            'n!': Growth(factorial=True),
+        }
+
+        for expr, growth in cases.items():
+            with self.subTest(expr):
+                self.assertEqual(parse_growth(expr), growth)
+
+    def test_fit_growth(self):
+        sizes = [10, 20, 40, 80]
+
+        for growth in [Growth(degree=1), Growth(degree=2)]:
+            values = [3 * math.exp(growth.log_value(size)) for size in sizes]
+            self.assertEqual(fit_growth(sizes, values), growth)
+
+    def test_compare_matching(self):
+        sizes = [10, 20, 40, 80]
+        values = [5 * size for size in sizes]
+
+        self.assertEqual(compare(Growth(degree=1), sizes, values, 0.5)[2], 'ok')
+
+    def test_compare_worse(self):
+        sizes = [8, 10, 12, 14]
+        values = [2 ** size for size in sizes]
+
+        self.assertEqual(
+            compare(Growth(degree=1), sizes, values, 0.5)[2], 'WORSE')
+
+    def test_compare_better(self):
+        sizes = [10, 20, 40, 80]
+        values = [size for size in sizes]
+
+        self.assertEqual(
+            compare(Growth(degree=2), sizes, values, 0.5)[2], 'better')
+
+    def test_targets_have_claims(self):
+        for target in TARGETS:
+            with self.subTest(target.name):
+                module = load_module(os.path.join(PUZZLES_DIR, target.path))
+                self.assertTrue(
+                    parse_claims(resolve(module, target.name).__doc__)
+                        or parse_claims(module.__doc__))
+                target.setup(module, target.sizes[0])()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--tolerance', type=float, default=0.5,
+        help='maximum log-log slope difference to consider a match')
+    args = parser.parse_args()
+
+    for target in TARGETS:
+        for check in check_target(target, args.repeat, args.tolerance):
+            print(format_check(check), flush=True)
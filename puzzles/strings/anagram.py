@@ -2,7 +2,8 @@
 # -*- coding: UTF-8 -*-
 
 """
-Check if two words are an anagram of each other.
+Check if two words are an anagram of each other, or group a list of words
+(one per line when read from stdin) into anagram classes.
 Assumes case-insensitivity.
 
 Example: are ear
@@ -12,9 +13,15 @@ letters of a different word or phrase, typically using all the original
 letters exactly once."
 """
 
-from typing import Dict
+from typing import Dict, Iterable, Iterator, List, Sequence, Tuple
+import sys
 import unittest
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 
 def is_anagram_by_sorting(word_1: str, word_2: str) -> bool:
     """
@@ -124,6 +131,128 @@ def is_anagram_by_histogram(word_1: str, word_2: str) -> bool:
     return len(hist_1) == 0
 
 
+def are_anagrams_bulk(
+        words_1: Sequence[str],
+        words_2: Sequence[str],
+        batch_size: int = 2**16) -> 'numpy.ndarray':
+
+    """
+    Check many word pairs at once, returning a boolean array with one entry
+    per pair. Pairs of different lengths are never anagrams. The rest of
+    each batch is grouped by length, and each group is encoded into an
+    exact width code point matrix, whose rows are sorted and compared as
+    arrays, without a per-character interpreter loop, nor padding.
+
+    Let:
+
+    - ``n=len(words_1)=len(words_2)``
+    - ``k=max(len(word) for word in words_1 + words_2)``
+
+    Then:
+
+    - **Time:** ``O(n k log k)``
+    - **Space:** ``O(c)``, where ``c=total length of a batch's words``
+    """
+
+    if numpy is None:
+        raise ImportError('NumPy is required for bulk anagram checks')
+    if len(words_1) != len(words_2):
+        raise ValueError('Word sequences differ in length')
+
+    are_anagrams = numpy.zeros(len(words_1), dtype=bool)
+
+    for start in range(0, len(words_1), batch_size):
+        end = start + batch_size
+        lengths_1 = _count_lengths(words_1[start:end])
+        lengths_2 = _count_lengths(words_2[start:end])
+
+        (same_length,) = numpy.nonzero(lengths_1 == lengths_2)
+        same_length = same_length[
+            numpy.argsort(lengths_1[same_length], kind='stable')]
+        group_starts = numpy.flatnonzero(
+            numpy.diff(lengths_1[same_length], prepend=-1))
+
+        for group in numpy.split(same_length, group_starts[1:]):
+            if len(group) == 0:
+                continue
+
+            width = int(lengths_1[group[0]])
+            positions = (start + group).tolist()
+            codes_1 = _encode_sorted_rows(
+                [words_1[i] for i in positions], width)
+            codes_2 = _encode_sorted_rows(
+                [words_2[i] for i in positions], width)
+
+            are_anagrams[start + group] = (codes_1 == codes_2).all(axis=1)
+
+    return are_anagrams
+
+
+def _count_lengths(words: Sequence[str]) -> 'numpy.ndarray':
+    return numpy.fromiter(map(len, words), dtype=numpy.int64, count=len(words))
+
+
+def _encode_sorted_rows(words: List[str], width: int) -> 'numpy.ndarray':
+    """
+    Encodes words of the same length into a matrix of per-row sorted code
+    points. Lone surrogates are encoded as is, like any other code point.
+    """
+
+    flat = numpy.frombuffer(
+        ''.join(words).encode('utf-32-le', 'surrogatepass'), dtype='<u4')
+
+    codes = flat.reshape(len(words), width).copy()
+    codes.sort(axis=1)
+    return codes
+
+
+def anagram_signature(word: str) -> str:
+    """
+    Canonical form shared by all anagrams of a word.
+
+    Let:
+
+    - ``k=len(word)``
+
+    Then:
+
+    - **Time:** ``O(k log k)``
+    - **Space:** ``O(k)``
+    """
+
+    return ''.join(sorted(word))
+
+
+def group_anagrams(words: Iterable[str]) -> Iterator[List[str]]:
+    """
+    Groups words into anagram classes, in order of first appearance, by
+    computing each word's signature once instead of comparing word pairs.
+
+    Let:
+
+    - ``n=len(words)``
+    - ``k=max(len(word) for word in words)``
+
+    Then:
+
+    - **Time:** ``O(n k log k)``
+    - **Space:** ``O(n k)`` -- one signature per class, plus the words
+    """
+
+    classes: Dict[str, List[str]] = {}
+
+    for word in words:
+        signature = anagram_signature(word)
+        anagrams = classes.get(signature)
+
+        if anagrams is None:
+            classes[signature] = [word]
+        else:
+            anagrams.append(word)
+
+    yield from classes.values()
+
+
 class BaseTestCase (unittest.TestCase):
     impl = None
     is_anagram = property(lambda self: self.impl)
@@ -165,5 +294,77 @@ class TestCaseByHistogram (BaseTestCase):
     impl = staticmethod(is_anagram_by_histogram)
 
 
+@unittest.skipIf(numpy is None, 'NumPy not available')
+class TestCaseBulk (BaseTestCase):
+    impl = staticmethod(are_anagrams_bulk)
+    is_anagram = property(lambda self:
+        lambda word_1, word_2: bool(self.impl([word_1], [word_2])[0]))
+
+    def test_batch(self):
+        self.assertEqual(
+            are_anagrams_bulk(
+                ['are', 'cat', 'state', 'cart', '', 'aab'],
+                ['ear', 'dog', 'taste', 'cat', '', 'abb'],
+                batch_size=4).tolist(),
+            [True, False, True, False, True, False])
+
+    def test_empty_batch(self):
+        self.assertEqual(are_anagrams_bulk([], []).tolist(), [])
+
+    def test_non_ascii(self):
+        self.assertEqual(
+            are_anagrams_bulk(['ação', 'niño'], ['çaão', 'ñino']).tolist(),
+            [True, True])
+
+    def test_mixed_lengths(self):
+        self.assertEqual(
+            are_anagrams_bulk(
+                ['ab', 'x' * 1000, 'abc', 'ba', 'cab'],
+                ['ba', 'x' * 999, 'cba', 'aa', 'abc'],
+                batch_size=3).tolist(),
+            [True, False, True, False, True])
+
+    def test_lone_surrogates(self):
+        self.assertEqual(
+            are_anagrams_bulk(['a\ud800', '\udc00'], ['\ud800a', 'a'])
+                .tolist(),
+            [is_anagram_by_sorting('a\ud800', '\ud800a'), False])
+
+    def test_different_lengths(self):
+        with self.assertRaises(ValueError):
+            are_anagrams_bulk(['cat'], [])
+
+
+class TestCaseGroupAnagrams (unittest.TestCase):
+    def test_empty(self):
+        self.assertEqual(list(group_anagrams([])), [])
+
+    def test_no_anagrams(self):
+        self.assertEqual(
+            list(group_anagrams(['cat', 'dog'])),
+            [['cat'], ['dog']])
+
+    def test_anagrams(self):
+        self.assertEqual(
+            list(group_anagrams(['are', 'cat', 'ear', 'act', 'era', 'tac'])),
+            [['are', 'ear', 'era'], ['cat', 'act', 'tac']])
+
+    def test_superset(self):
+        self.assertEqual(
+            list(group_anagrams(['cat', 'cart'])),
+            [['cat'], ['cart']])
+
+    def test_iterator(self):
+        self.assertEqual(
+            list(group_anagrams(iter(['state', 'taste']))),
+            [['state', 'taste']])
+
+
 if __name__ == '__main__':
-    unittest.main(verbosity=2)
+    if sys.stdin.isatty():
+        unittest.main(verbosity=2)
+    else:
+        words = (line.strip() for line in sys.stdin)
+
+        for anagrams in group_anagrams(word for word in words if word != ''):
+            print(' '.join(anagrams))
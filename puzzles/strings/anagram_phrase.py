@@ -0,0 +1,396 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+
+"""
+Find all multi-word anagrams of a phrase, using words from a dictionary.
+Assumes case-insensitivity, and ignores non-letter characters.
+
+Example: "dormitory" gives "dirty room"
+
+The dictionary is preprocessed once into an index file with the letter counts
+of each anagram class, which is then memory-mapped for each query.
+
+Usage:
+
+- ``anagram_phrase.py index DICTIONARY INDEX``
+- ``anagram_phrase.py solve [--max-words N] INDEX PHRASE``
+"""
+
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+import argparse
+import itertools
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import unittest
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from anagram import anagram_signature
+
+
+INDEX_MAGIC = b'ANAGRAM1'
+
+# Alphabet length (bytes), and number of anagram classes.
+INDEX_HEADER = struct.Struct('<II')
+
+# Each anagram class stores one count byte per alphabet letter.
+MAX_LETTER_COUNT = 255
+
+
+def normalize(phrase: str) -> str:
+    return ''.join(char for char in phrase.lower() if char.isalpha())
+
+
+def build_index(words: Iterable[str], path: str) -> None:
+    """
+    File layout, after the magic and header:
+
+    - UTF-8 alphabet, sorted
+    - letter counts, one row of alphabet length bytes per class
+    - word offsets, one 32-bit offset per class plus the end offset
+    - UTF-8 words, newline separated within each class
+
+    Let:
+
+    - ``n=len(words)``
+    - ``k=max(len(word) for word in words)``
+    - ``a=len(alphabet)``, ``c=number of anagram classes``
+
+    Then:
+
+    - **Time:** ``O(n k log k + c a)``
+    - **Space:** ``O(n k + c a)``
+    """
+
+    classes: Dict[str, Dict[str, None]] = {}
+
+    for word in words:
+        word = word.strip()
+        letters = normalize(word)
+
+        if letters != '':
+            classes.setdefault(anagram_signature(letters), {})[word] = None
+
+    alphabet = ''.join(sorted(set(''.join(classes))))
+    letter_index = {letter: i for i, letter in enumerate(alphabet)}
+    encoded_alphabet = alphabet.encode('utf-8')
+
+    counts = bytearray(len(classes) * len(alphabet))
+    words_blob = bytearray()
+    offsets = []
+
+    for row, (signature, class_words) in enumerate(classes.items()):
+        for letter in signature:
+            position = (row * len(alphabet)) + letter_index[letter]
+
+            if counts[position] == MAX_LETTER_COUNT:
+                raise ValueError('Too many letters in word: %s' % signature)
+
+            counts[position] += 1
+
+        offsets.append(len(words_blob))
+        words_blob += '\n'.join(class_words).encode('utf-8')
+
+    offsets.append(len(words_blob))
+
+    with open(path, 'wb') as index_file:
+        index_file.write(INDEX_MAGIC)
+        index_file.write(
+            INDEX_HEADER.pack(len(encoded_alphabet), len(classes)))
+        index_file.write(encoded_alphabet)
+        index_file.write(counts)
+        index_file.write(struct.pack('<%dI' % len(offsets), *offsets))
+        index_file.write(words_blob)
+
+
+class AnagramIndex:
+    """
+    Memory-mapped view of an index file, so that loading it doesn't read or
+    parse the whole dictionary.
+    """
+
+    def __init__(self, path: str):
+        with open(path, 'rb') as index_file:
+            self._mmap = mmap.mmap(
+                index_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self._mmap[:len(INDEX_MAGIC)] != INDEX_MAGIC:
+            self._mmap.close()
+            raise ValueError('Not an anagram index file: %s' % path)
+
+        start = len(INDEX_MAGIC)
+        (alphabet_size, self.num_classes) = INDEX_HEADER.unpack_from(
+            self._mmap, start)
+        start += INDEX_HEADER.size
+
+        self.alphabet = self._mmap[start:start + alphabet_size] \
+            .decode('utf-8')
+        start += alphabet_size
+
+        self._counts_start = start
+        start += self.num_classes * len(self.alphabet)
+
+        self._offsets_start = start
+        self._words_start = start + ((self.num_classes + 1) * 4)
+
+    def __enter__(self) -> 'AnagramIndex':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._mmap.close()
+
+    def counts(self, klass: int) -> bytes:
+        start = self._counts_start + (klass * len(self.alphabet))
+        return self._mmap[start:start + len(self.alphabet)]
+
+    def find_fitting(self, budget: List[int]) -> List[int]:
+        """
+        Classes whose letter counts fit within the `budget`, compared all at
+        once over the memory-mapped counts if NumPy is available, instead of
+        class by class.
+        """
+
+        if (numpy is None) or (self.num_classes == 0):
+            return [klass for klass in range(self.num_classes)
+                if fits(self.counts(klass), budget)]
+
+        counts = numpy.frombuffer(
+            self._mmap,
+            dtype=numpy.uint8,
+            count=self.num_classes * len(self.alphabet),
+            offset=self._counts_start)
+
+        fitting = (counts.reshape(self.num_classes, len(self.alphabet))
+            <= numpy.array(budget)).all(axis=1)
+
+        # Release the view, otherwise the memory-map can't be closed.
+        del counts
+        return numpy.flatnonzero(fitting).tolist()
+
+    def words(self, klass: int) -> List[str]:
+        (start, end) = struct.unpack_from(
+            '<2I', self._mmap, self._offsets_start + (klass * 4))
+
+        words = self._mmap[self._words_start + start:self._words_start + end]
+        return words.decode('utf-8').split('\n')
+
+
+def find_phrase_anagrams(
+        index: AnagramIndex,
+        phrase: str,
+        max_words: Optional[int] = None) -> Iterator[Tuple[str, ...]]:
+
+    """
+    Depth-first search over anagram classes, in index order to avoid
+    repeating the same combination in different orders. At each step only
+    classes that fit the remaining letter budget are kept, and the branch is
+    pruned when some remaining letter isn't in any of them.
+
+    Let:
+
+    - ``c=number of anagram classes``, ``a=len(alphabet)``
+    - ``w=maximum number of words in an anagram``
+
+    Then:
+
+    - **Time:** ``O(c^w a)`` -- worst-case, before pruning
+    - **Space:** ``O(w c)``
+    """
+
+    letter_index = {letter: i for i, letter in enumerate(index.alphabet)}
+    budget = [0] * len(index.alphabet)
+
+    for letter in normalize(phrase):
+        if letter not in letter_index:
+            return
+
+        budget[letter_index[letter]] += 1
+
+    if sum(budget) == 0:
+        return
+
+    candidates = [(klass, index.counts(klass))
+        for klass in index.find_fitting(budget)]
+
+    for classes in search_classes(candidates, budget, max_words):
+        # A class used more than once gives each multiset of its words once,
+        # not once per order.
+        for words_per_class in itertools.product(*(
+                itertools.combinations_with_replacement(
+                    index.words(klass), len(list(repeats)))
+                for (klass, repeats) in itertools.groupby(classes))):
+
+            yield tuple(itertools.chain.from_iterable(words_per_class))
+
+
+def fits(counts: bytes, budget: List[int]) -> bool:
+    for count, available in zip(counts, budget):
+        if count > available:
+            return False
+
+    return True
+
+
+def search_classes(
+        candidates: List[Tuple[int, bytes]],
+        budget: List[int],
+        max_words: Optional[int]) -> Iterator[List[int]]:
+
+    """
+    Yields lists of classes whose letter counts add up to the `budget`,
+    using only classes at or after the first candidate.
+    """
+
+    if (max_words is not None) and (max_words <= 0):
+        return
+
+    covered = [False] * len(budget)
+
+    for (_, counts) in candidates:
+        for letter, count in enumerate(counts):
+            if count > 0:
+                covered[letter] = True
+
+    for letter, available in enumerate(budget):
+        if (available > 0) and not covered[letter]:
+            return
+
+    remaining_max_words = None if max_words is None else max_words - 1
+
+    for position, (klass, counts) in enumerate(candidates):
+        remaining = [available - count
+            for available, count in zip(budget, counts)]
+
+        if sum(remaining) == 0:
+            yield [klass]
+            continue
+
+        remaining_candidates = [
+            candidate for candidate in candidates[position:]
+            if fits(candidate[1], remaining)]
+
+        for classes in search_classes(
+                remaining_candidates, remaining, remaining_max_words):
+            yield [klass] + classes
+
+
+class Test (unittest.TestCase):
+    dictionary = [
+        'dirty', 'room', 'dormitory', 'Moor', 'a', 'an', 'ana', 'nag', 'ram',
+        'gram', 'anagram', "don't", 'I', 'am',
+    ]
+
+    def setUp(self):
+        (fd, self.index_path) = tempfile.mkstemp()
+        os.close(fd)
+        build_index(self.dictionary, self.index_path)
+        self.index = AnagramIndex(self.index_path)
+
+    def tearDown(self):
+        self.index.close()
+        os.remove(self.index_path)
+
+    def find(self, phrase: str, **kwargs) -> List[List[str]]:
+        return sorted(sorted(words)
+            for words in find_phrase_anagrams(self.index, phrase, **kwargs))
+
+    def test_index(self):
+        self.assertEqual(self.index.alphabet, 'adgimnorty')
+        self.assertEqual(self.index.num_classes, 13)
+        self.assertEqual(self.index.words(1), ['room', 'Moor'])
+
+    def test_find_fitting(self):
+        budget = [1] * len(self.index.alphabet)
+        budget[self.index.alphabet.index('a')] = 2
+
+        self.assertEqual(
+            self.index.find_fitting(budget),
+            [klass for klass in range(self.index.num_classes)
+                if fits(self.index.counts(klass), budget)])
+
+    def test_not_an_index(self):
+        with open(self.index_path, 'wb') as index_file:
+            index_file.write(b'not an index')
+
+        with self.assertRaises(ValueError):
+            AnagramIndex(self.index_path)
+
+    def test_empty_phrase(self):
+        self.assertEqual(self.find(''), [])
+
+    def test_unknown_letter(self):
+        self.assertEqual(self.find('dormitoryz'), [])
+
+    def test_single_word(self):
+        self.assertEqual(self.find('Ram'), [['ram']])
+
+    def test_multiple_words(self):
+        self.assertEqual(self.find('dirty room'), [
+            ['Moor', 'dirty'],
+            ['dirty', 'room'],
+            ['dormitory'],
+        ])
+
+    def test_repeated_word(self):
+        self.assertEqual(self.find('aa'), [['a', 'a']])
+
+    def test_repeated_class(self):
+        self.assertEqual(self.find('roomroom'), [
+            ['Moor', 'Moor'],
+            ['Moor', 'room'],
+            ['room', 'room'],
+        ])
+
+    def test_max_words(self):
+        self.assertEqual(self.find('anagram', max_words=1), [['anagram']])
+        self.assertEqual(self.find('anagram', max_words=2), [
+            ['ana', 'gram'],
+            ['anagram'],
+        ])
+
+    def test_no_max_words(self):
+        self.assertEqual(self.find('anagram'), [
+            ['a', 'an', 'gram'],
+            ['a', 'nag', 'ram'],
+            ['ana', 'gram'],
+            ['anagram'],
+        ])
+
+
+if __name__ == '__main__':
+    if len(sys.argv) <= 1:
+        unittest.main(verbosity=2)
+    else:
+        parser = argparse.ArgumentParser(
+            description=__doc__,
+            formatter_class=argparse.RawDescriptionHelpFormatter)
+        commands = parser.add_subparsers(dest='command', required=True)
+
+        index_command = commands.add_parser('index')
+        index_command.add_argument('dictionary')
+        index_command.add_argument('index')
+
+        solve_command = commands.add_parser('solve')
+        solve_command.add_argument('--max-words', type=int)
+        solve_command.add_argument('index')
+        solve_command.add_argument('phrase', nargs='+')
+
+        args = parser.parse_args()
+
+        if args.command == 'index':
+            with open(args.dictionary, encoding='utf-8') as dictionary:
+                build_index(dictionary, args.index)
+        else:
+            with AnagramIndex(args.index) as index:
+                for words in find_phrase_anagrams(
+                        index, ' '.join(args.phrase), args.max_words):
+                    print(' '.join(words))
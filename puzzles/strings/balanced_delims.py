@@ -5,8 +5,23 @@
 Check if a string contains only balanced delimiters.
 
 Example: ({}[])
+
+Reads lines from stdin when not a terminal, and checks each line starting
+with a delimiter, optionally across multiple processes.
+
+Given file paths as arguments, checks each file's delimiters in chunks instead,
+optionally across multiple processes, ignoring any other characters, and
+reports the byte offset of the first mismatch.
 """
 
+from dataclasses import dataclass, field
+from typing import BinaryIO, Iterable, Iterator, List, Optional, Tuple
+import argparse
+import io
+import multiprocessing
+import os
+import re
+import tempfile
 import unittest
 import sys
 
@@ -36,6 +51,251 @@ def is_balanced(string: str) -> bool:
     return len(expected_close) == 0
 
 
+@dataclass
+class DelimsSummary:
+    """
+    Reduction of a contiguous range of a source into what can't be decided
+    without its surroundings: closing delimiters (with their offsets) that
+    must match open ones before it, and the closing delimiters expected
+    after it, innermost last. A mismatch within the range itself is final.
+    """
+
+    end_offset: int
+    unmatched_close: List[Tuple[int, int]] = field(default_factory=list)
+    expected_close: List[int] = field(default_factory=list)
+    mismatch_offset: Optional[int] = None
+
+
+def summarize_delims(
+        source: BinaryIO,
+        offset: int = 0,
+        length: Optional[int] = None,
+        chunk_size: int = 2**20) -> DelimsSummary:
+
+    """
+    Reads up to `length` bytes from a file-like (or memory-mapped) source in
+    chunks, skipping bytes that aren't delimiters, and carrying the expected
+    closing delimiters across chunk boundaries. The `offset` is the source
+    position, for reporting. At offset 0 nothing comes before, so an
+    unmatched closing delimiter is a final mismatch, and reading stops.
+
+    Time: O(n), where n=length
+    Space: O(d + c), where d=maximum nesting depth, c=chunk size
+    """
+
+    open_to_close = {
+        ord('('): ord(')'),
+        ord('['): ord(']'),
+        ord('{'): ord('}'),
+    }
+
+    delims = re.compile(rb'[()\[\]{}]')
+    summary = DelimsSummary(end_offset=offset)
+    expected_close = summary.expected_close
+
+    while (length is None) or (summary.end_offset - offset < length):
+        if length is None:
+            chunk = source.read(chunk_size)
+        else:
+            chunk = source.read(
+                min(chunk_size, length - (summary.end_offset - offset)))
+
+        if len(chunk) == 0:
+            break
+
+        for match in delims.finditer(chunk):
+            char = chunk[match.start()]
+
+            if char in open_to_close:
+                expected_close.append(open_to_close[char])
+            elif (len(expected_close) > 0) and (expected_close[-1] == char):
+                expected_close.pop()
+            elif (len(expected_close) == 0) and (offset > 0):
+                summary.unmatched_close.append(
+                    (summary.end_offset + match.start(), char))
+            else:
+                summary.mismatch_offset = summary.end_offset + match.start()
+                return summary
+
+        summary.end_offset += len(chunk)
+
+    return summary
+
+
+def combine_delims_summaries(
+        summaries: Iterable[DelimsSummary]) -> Optional[int]:
+
+    """
+    Combines summaries of consecutive ranges, in order. Returns the byte
+    offset of the first mismatched closing delimiter, or the end offset if
+    some are left open, or `None` if all ranges together are balanced.
+
+    Time: O(d), where d=total unmatched delimiters across summaries
+    Space: O(d)
+    """
+
+    expected_close: List[int] = []
+    end_offset = None
+
+    for summary in summaries:
+        for (offset, char) in summary.unmatched_close:
+            if (len(expected_close) == 0) or (expected_close[-1] != char):
+                return offset
+
+            expected_close.pop()
+
+        if summary.mismatch_offset is not None:
+            return summary.mismatch_offset
+
+        expected_close.extend(summary.expected_close)
+        end_offset = summary.end_offset
+
+    if len(expected_close) > 0:
+        return end_offset
+    else:
+        return None
+
+
+def find_unbalanced_offset(
+        source: BinaryIO,
+        chunk_size: int = 2**20) -> Optional[int]:
+
+    """
+    Time: O(n), where n=source length
+    Space: O(d + c), where d=maximum nesting depth, c=chunk size
+    """
+
+    return combine_delims_summaries(
+        [summarize_delims(source, chunk_size=chunk_size)])
+
+
+def summarize_file_range(
+        path: str,
+        offset: int,
+        length: int,
+        chunk_size: int) -> DelimsSummary:
+
+    with open(path, 'rb') as file:
+        file.seek(offset)
+        return summarize_delims(file, offset, length, chunk_size)
+
+
+def find_unbalanced_offset_parallel(
+        path: str,
+        processes: Optional[int] = None,
+        chunk_size: int = 2**20) -> Optional[int]:
+
+    """
+    Splits a file into one range per process, summarizes each range in a
+    separate process, and combines the summaries in order.
+
+    Time: O(n/p + d), where n=file size, p=processes, d=unmatched delimiters
+    Space: O(p (d + c)), where c=chunk size
+    """
+
+    if processes is None:
+        processes = os.cpu_count() or 1
+
+    size = os.path.getsize(path)
+    range_length = max(1, -(-size // processes))
+    ranges = [(path, offset, range_length, chunk_size)
+        for offset in range(0, size, range_length)]
+
+    if len(ranges) <= 1:
+        with open(path, 'rb') as file:
+            return find_unbalanced_offset(file, chunk_size)
+
+    with multiprocessing.Pool(min(processes, len(ranges))) as pool:
+        return combine_delims_summaries(
+            pool.starmap(summarize_file_range, ranges))
+
+
+DELIMS = b'(){}[]'
+
+# Deletes every byte but delimiters.
+NON_DELIMS = bytes(byte for byte in range(256) if byte not in DELIMS)
+
+
+def iter_line_blocks(
+        source: BinaryIO,
+        block_size: int = 2**20) -> Iterator[List[bytes]]:
+
+    """
+    Reads a source in large blocks, yielding the complete lines in each.
+
+    Time: O(n), where n=source length
+    Space: O(b + l), where b=block size, l=longest line length
+    """
+
+    partial_line = b''
+
+    while True:
+        block = source.read(block_size)
+
+        if len(block) == 0:
+            break
+
+        lines = (partial_line + block).split(b'\n')
+        partial_line = lines.pop()
+
+        if len(lines) > 0:
+            yield lines
+
+    if len(partial_line) > 0:
+        yield [partial_line]
+
+
+def check_lines(lines: List[bytes]) -> bytes:
+    """
+    Checks lines starting with a delimiter, giving one YES/NO output line for
+    each. Non-delimiter characters are deleted in bulk via a translation
+    table first, and any line that had some is unbalanced without scanning.
+
+    Time: O(n), where n=total lines length
+    Space: O(n)
+    """
+
+    output = []
+
+    for line in lines:
+        if (len(line) == 0) or (line[0] not in DELIMS):
+            continue
+
+        line = line.strip()
+        delims = line.translate(None, NON_DELIMS)
+
+        if (len(delims) == len(line)) and is_balanced(delims.decode('ascii')):
+            output.append(b'YES\n')
+        else:
+            output.append(b'NO\n')
+
+    return b''.join(output)
+
+
+def check_stream(
+        source: BinaryIO,
+        output: BinaryIO,
+        processes: int = 1,
+        block_size: int = 2**20) -> None:
+
+    """
+    Checks every line read from a source in blocks, spread over a process
+    pool if more than one, and writes all results for each block at once.
+    """
+
+    blocks = iter_line_blocks(source, block_size)
+
+    if processes <= 1:
+        for block in blocks:
+            output.write(check_lines(block))
+    else:
+        with multiprocessing.Pool(processes) as pool:
+            for block_output in pool.imap(check_lines, blocks):
+                output.write(block_output)
+
+    output.flush()
+
+
 class Test (unittest.TestCase):
     def test_balanced(self):
         cases = [
@@ -61,13 +321,113 @@ class Test (unittest.TestCase):
             self.assertFalse(is_balanced(case))
 
 
+class TestCheckStream (unittest.TestCase):
+    lines = [
+        b'([])([])',
+        b'skipped',
+        b'',
+        b'([)]',
+        b'(a)',
+        b'{[]}\r',
+        b'([]',
+    ]
+
+    def check(self, **kwargs) -> bytes:
+        output = io.BytesIO()
+        check_stream(io.BytesIO(b'\n'.join(self.lines)), output, **kwargs)
+        return output.getvalue()
+
+    def test_sequential(self):
+        self.assertEqual(
+            self.check(block_size=3),
+            b'YES\nNO\nNO\nYES\nNO\n')
+
+    def test_parallel(self):
+        self.assertEqual(
+            self.check(block_size=3, processes=2),
+            b'YES\nNO\nNO\nYES\nNO\n')
+
+    def test_line_blocks(self):
+        self.assertEqual(
+            list(iter_line_blocks(io.BytesIO(b'ab\ncd\ne'), block_size=4)),
+            [[b'ab'], [b'cd'], [b'e']])
+
+
+class TestUnbalancedOffset (unittest.TestCase):
+    def find(self, data: bytes) -> Optional[int]:
+        return find_unbalanced_offset(io.BytesIO(data), chunk_size=3)
+
+    def test_balanced(self):
+        cases = [
+            b'',
+            b'([])([])',
+            b'{"a": [1, 2, {"b": (3)}]}',
+        ]
+
+        for case in cases:
+            self.assertIsNone(self.find(case))
+
+    def test_mismatch(self):
+        cases = {
+            b'([)]': 2,
+            b'[])': 2,
+            b'{"a": [1, 2}': 11,
+        }
+
+        for case, offset in cases.items():
+            self.assertEqual(self.find(case), offset)
+
+    def test_left_open(self):
+        self.assertEqual(self.find(b'{"a": [1, 2]'), 12)
+
+    def test_leading_close_stops_reading(self):
+        source = io.BytesIO(b']' + b')' * 100_000)
+        self.assertEqual(find_unbalanced_offset(source, chunk_size=16), 0)
+        self.assertEqual(source.tell(), 16)
+
+
+class TestUnbalancedOffsetParallel (TestUnbalancedOffset):
+    def find(self, data: bytes) -> Optional[int]:
+        (fd, path) = tempfile.mkstemp()
+
+        try:
+            with os.fdopen(fd, 'wb') as file:
+                file.write(data)
+
+            return find_unbalanced_offset_parallel(
+                path, processes=3, chunk_size=2)
+        finally:
+            os.remove(path)
+
+    def test_combine_summaries(self):
+        summaries = [
+            DelimsSummary(end_offset=2, expected_close=[ord(')'), ord(']')]),
+            DelimsSummary(end_offset=4, unmatched_close=[(2, ord(']'))]),
+            DelimsSummary(end_offset=6, unmatched_close=[(5, ord('}'))]),
+        ]
+
+        self.assertEqual(combine_delims_summaries(summaries[:2]), 4)
+        self.assertEqual(combine_delims_summaries(summaries), 5)
+
+
 if __name__ == '__main__':
-    if sys.stdin.isatty():
+    if (len(sys.argv) <= 1) and sys.stdin.isatty():
         unittest.main(verbosity=2)
     else:
-        for line in sys.stdin:
-            if line[0] in '(){}[]':
-                if is_balanced(line.strip()):
-                    print('YES')
-                else:
-                    print('NO')
+        parser = argparse.ArgumentParser(
+            description=__doc__,
+            formatter_class=argparse.RawDescriptionHelpFormatter)
+        parser.add_argument('paths', nargs='*', metavar='PATH')
+        parser.add_argument('--processes', type=int, default=1)
+        args = parser.parse_args()
+
+        if len(args.paths) == 0:
+            check_stream(sys.stdin.buffer, sys.stdout.buffer, args.processes)
+
+        for path in args.paths:
+            offset = find_unbalanced_offset_parallel(path, args.processes)
+
+            if offset is None:
+                print('YES')
+            else:
+                print('NO %d' % offset)
@@ -5,8 +5,15 @@
 Check if a string contains only balanced parenthesis.
 """
 
+from dataclasses import dataclass
+from typing import Optional, Sequence, Union
 import unittest
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 
 def is_balanced(string: str) -> bool:
     """
@@ -29,6 +36,131 @@ def is_balanced(string: str) -> bool:
     return depth == 0
 
 
+@dataclass
+class DepthProfile:
+    is_balanced: bool
+    max_depth: int
+    max_depth_offset: Optional[int]
+
+
+@dataclass
+class BatchDepthProfile:
+    """
+    One entry per string, with `max_depth_offset` set to -1 where there's no
+    nesting at all.
+    """
+
+    is_balanced: 'numpy.ndarray'
+    max_depth: 'numpy.ndarray'
+    max_depth_offset: 'numpy.ndarray'
+
+
+def to_depth_steps(strings: Sequence[Union[str, bytes]]) -> 'numpy.ndarray':
+    """
+    Concatenates strings into an array of +1/-1 depth steps, one per
+    parenthesis.
+    """
+
+    try:
+        encoded = ''.join(strings).encode('utf-8')
+    except TypeError:
+        encoded = b''.join(
+            string.encode('utf-8') if isinstance(string, str) else string
+            for string in strings)
+
+    codes = numpy.frombuffer(encoded, dtype=numpy.uint8)
+    steps = _STEPS[codes]
+
+    if (steps == 0).any():
+        raise Exception('Invalid string')
+
+    return steps
+
+
+def depth_profile(string: Union[str, bytes]) -> DepthProfile:
+    """
+    Vectorized balance check via the cumulative sum of depth steps: balanced
+    if it never goes negative and ends at zero. Also gives the maximum
+    nesting depth, and the offset where it's first reached.
+
+    Time: O(n), where n=string length
+    Space: O(n)
+    """
+
+    if numpy is None:
+        raise ImportError('NumPy is required for depth profiles')
+    if len(string) == 0:
+        return DepthProfile(True, 0, None)
+
+    depths = numpy.cumsum(to_depth_steps([string]), dtype=numpy.int64)
+    max_depth_offset = int(depths.argmax())
+    max_depth = int(depths[max_depth_offset])
+
+    if max_depth <= 0:
+        (max_depth, max_depth_offset) = (0, None)
+
+    return DepthProfile(
+        is_balanced=bool((depths.min() >= 0) and (depths[-1] == 0)),
+        max_depth=max_depth,
+        max_depth_offset=max_depth_offset)
+
+
+def depth_profiles(strings: Sequence[Union[str, bytes]]) -> BatchDepthProfile:
+    """
+    Batch version of `depth_profile`, for many strings at once. Strings are
+    concatenated into one array, with the cumulative depth rebased at each
+    string's start offset, and reduced per string segment.
+
+    Time: O(n), where n=total strings length
+    Space: O(n)
+    """
+
+    if numpy is None:
+        raise ImportError('NumPy is required for depth profiles')
+
+    lengths = numpy.fromiter(
+        map(len, strings), dtype=numpy.int64, count=len(strings))
+    is_balanced = numpy.ones(len(strings), dtype=bool)
+    max_depth = numpy.zeros(len(strings), dtype=numpy.int64)
+    max_depth_offset = numpy.full(len(strings), -1, dtype=numpy.int64)
+
+    non_empty = numpy.flatnonzero(lengths > 0)
+
+    if len(non_empty) == 0:
+        return BatchDepthProfile(is_balanced, max_depth, max_depth_offset)
+
+    steps = to_depth_steps(strings)
+    starts = numpy.concatenate(([0], numpy.cumsum(lengths)[:-1]))[non_empty]
+    segments = numpy.repeat(numpy.arange(len(non_empty)), lengths[non_empty])
+
+    depths = numpy.cumsum(steps, dtype=numpy.int64)
+    depths -= (depths[starts] - steps[starts])[segments]
+
+    ends = starts + lengths[non_empty] - 1
+    is_balanced[non_empty] = (numpy.minimum.reduceat(depths, starts) >= 0) \
+        & (depths[ends] == 0)
+
+    # Every segment reaches its own maximum at least once.
+    segment_max = numpy.maximum.reduceat(depths, starts)
+    max_positions = numpy.flatnonzero(depths == segment_max[segments])
+    max_segments = segments[max_positions]
+    first_max = numpy.flatnonzero(
+        numpy.diff(max_segments, prepend=-1) != 0)
+
+    has_nesting = segment_max > 0
+    max_depth[non_empty[has_nesting]] = segment_max[has_nesting]
+    max_depth_offset[non_empty[has_nesting]] = \
+        max_positions[first_max][has_nesting] - starts[has_nesting]
+
+    return BatchDepthProfile(is_balanced, max_depth, max_depth_offset)
+
+
+if numpy is not None:
+    _STEPS = numpy.zeros(256, dtype=numpy.int8)
+    _STEPS[ord('(')] = 1
+    _STEPS[ord(')')] = -1
+
+
 class Test (unittest.TestCase):
     def test_balanced(self):
         cases = [
@@ -59,5 +191,50 @@ class Test (unittest.TestCase):
                              'Non-balanced parenthesis: %s' % case)
 
 
+@unittest.skipIf(numpy is None, 'NumPy not available')
+class TestDepthProfile (unittest.TestCase):
+    cases = {
+        '': DepthProfile(True, 0, None),
+        '()': DepthProfile(True, 1, 0),
+        '()(())': DepthProfile(True, 2, 3),
+        '(()())': DepthProfile(True, 2, 1),
+        '(()': DepthProfile(False, 2, 1),
+        ')()': DepthProfile(False, 0, None),
+        '())(((': DepthProfile(False, 2, 5),
+        '))': DepthProfile(False, 0, None),
+    }
+
+    def test_single(self):
+        for string, profile in self.cases.items():
+            with self.subTest(string):
+                self.assertEqual(depth_profile(string), profile)
+
+    def test_batch(self):
+        profiles = depth_profiles(list(self.cases))
+        offsets = [-1 if profile.max_depth_offset is None
+            else profile.max_depth_offset for profile in self.cases.values()]
+
+        self.assertEqual(
+            profiles.is_balanced.tolist(),
+            [profile.is_balanced for profile in self.cases.values()])
+        self.assertEqual(
+            profiles.max_depth.tolist(),
+            [profile.max_depth for profile in self.cases.values()])
+        self.assertEqual(profiles.max_depth_offset.tolist(), offsets)
+
+    def test_empty_batch(self):
+        self.assertEqual(depth_profiles([]).is_balanced.tolist(), [])
+        self.assertEqual(depth_profiles(['']).is_balanced.tolist(), [True])
+
+    def test_bytes(self):
+        self.assertTrue(depth_profile(b'(())').is_balanced)
+
+    def test_invalid(self):
+        with self.assertRaises(Exception):
+            depth_profile('(a)')
+        with self.assertRaises(Exception):
+            depth_profiles(['()', '(a)'])
+
+
 if __name__ == '__main__':
     unittest.main(verbosity=2)
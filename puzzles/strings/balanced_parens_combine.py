@@ -7,10 +7,17 @@ List all possible balanced parenthesis combinations up to `total` pairs.
 Example: 2 total pairs gives '()()' and '(())'
 """
 
-from typing import Iterator, List
+from functools import lru_cache
+from typing import Callable, Iterator, List, Optional, Tuple, TypeVar
+import math
+import multiprocessing
+import os
 import unittest
 
 
+T = TypeVar('T')
+
+
 def permute_recur(
         max_num_pairs: int,
         parens: str = '()',
@@ -53,15 +60,230 @@ def permute(total: int, num_open: int = 0, num_closed: int = 0) -> List[str]:
     return combinations
 
 
+def next_combination(parens: List[str]) -> bool:
+    """
+    Advances a combination in-place to the next one in lexicographic order,
+    by replacing the rightmost open parenthesis that can be closed instead,
+    followed by the smallest completion: all remaining open parenthesis, then
+    all remaining closed ones. Returns false if it's already the last one.
+
+    Time: O(n), where n=number of pairs
+    Space: O(n)
+    """
+
+    num_open = 0
+    num_closed = 0
+
+    for i in range(len(parens) - 1, -1, -1):
+        if parens[i] == ')':
+            num_closed += 1
+            continue
+
+        num_open += 1
+
+        # Depth right before this open parenthesis.
+        if (num_closed - num_open) >= 1:
+            parens[i:] = [')'] + ['('] * num_open + [')'] * (num_closed - 1)
+            return True
+
+    return False
+
+
+def permute_lexicographic(total: int) -> Iterator[str]:
+    """
+    Iterative, in lexicographic order, starting with all open parenthesis
+    first.
+
+    Time: O(n C(n)), where C(n)=nth Catalan number, the number of combinations
+    Space: O(n)
+    """
+
+    if total <= 0:
+        return
+
+    parens = ['('] * total + [')'] * total
+
+    while True:
+        yield ''.join(parens)
+
+        if not next_combination(parens):
+            return
+
+
+def count_combinations(total: int) -> int:
+    """
+    The nth Catalan number, without generating any combination, or zero for
+    no pairs to match the other functions.
+
+    Time: O(n^2), for big integer arithmetic
+    Space: O(n)
+    """
+
+    if total <= 0:
+        return 0
+
+    return math.comb(2 * total, total) // (total + 1)
+
+
+@lru_cache(maxsize=None)
+def ballot_table(total: int) -> Tuple[Tuple[int, ...], ...]:
+    """
+    Number of ways to complete a combination with `length` parenthesis left
+    to place, starting at a nesting `depth`, as `table[length][depth]`.
+
+    Time: O(n^2), where n=number of pairs
+    Space: O(n^2)
+    """
+
+    table = [[0] * (total + 2) for _ in range(2 * total + 1)]
+    table[0][0] = 1
+
+    for length in range(1, 2 * total + 1):
+        for depth in range(0, total + 1):
+            table[length][depth] = table[length - 1][depth + 1]
+
+            if depth > 0:
+                table[length][depth] += table[length - 1][depth - 1]
+
+    return tuple(tuple(row) for row in table)
+
+
+def unrank(total: int, index: int) -> str:
+    """
+    Combination at `index` in lexicographic order, where ``0 <= index <
+    count_combinations(total)``.
+
+    Time: O(n), where n=number of pairs, after building the ballot table
+    Space: O(n^2)
+    """
+
+    if not (0 <= index < count_combinations(total)):
+        raise IndexError('Combination index out of range: %d' % index)
+
+    table = ballot_table(total)
+    parens = []
+    depth = 0
+
+    for length in range(2 * total, 0, -1):
+        num_with_open = table[length - 1][depth + 1] if depth < total else 0
+
+        if index < num_with_open:
+            parens.append('(')
+            depth += 1
+        else:
+            index -= num_with_open
+            parens.append(')')
+            depth -= 1
+
+    return ''.join(parens)
+
+
+def rank(parens: str) -> int:
+    """
+    Index of a combination in lexicographic order, the inverse of `unrank`.
+
+    Time: O(n), where n=number of pairs, after building the ballot table
+    Space: O(n^2)
+    """
+
+    total = len(parens) // 2
+
+    if (len(parens) % 2 != 0) or (total == 0):
+        raise ValueError('Invalid combination: %r' % parens)
+
+    table = ballot_table(total)
+    index = 0
+    depth = 0
+
+    for length, paren in zip(range(len(parens), 0, -1), parens):
+        if paren == '(':
+            depth += 1
+        elif paren == ')':
+            if depth < total:
+                index += table[length - 1][depth + 1]
+            depth -= 1
+        else:
+            raise ValueError('Invalid combination: %r' % parens)
+
+        if not (0 <= depth <= total):
+            raise ValueError('Invalid combination: %r' % parens)
+
+    if depth != 0:
+        raise ValueError('Invalid combination: %r' % parens)
+
+    return index
+
+
+def permute_range(total: int, start: int, stop: int) -> Iterator[str]:
+    """
+    Combinations with indexes in ``[start, stop)``, in lexicographic order.
+
+    Time: O(n (stop - start)), where n=number of pairs
+    Space: O(n^2)
+    """
+
+    stop = min(stop, count_combinations(total))
+
+    if start >= stop:
+        return
+
+    parens = list(unrank(total, start))
+
+    for _ in range(start, stop - 1):
+        yield ''.join(parens)
+        next_combination(parens)
+
+    yield ''.join(parens)
+
+
+def process_range(
+        total: int,
+        start: int,
+        stop: int,
+        process: Callable[[Iterator[str]], T]) -> T:
+
+    return process(permute_range(total, start, stop))
+
+
+def process_parallel(
+        total: int,
+        process: Callable[[Iterator[str]], T],
+        processes: Optional[int] = None,
+        num_shards: Optional[int] = None) -> List[T]:
+
+    """
+    Splits the index range of all combinations into shards, and calls
+    `process` on each shard's combinations in a separate process. Results are
+    in shard order. The `process` callable must be picklable.
+
+    Time: O(n C(n) / p), where C(n)=nth Catalan number, p=processes
+    Space: O(p n^2)
+    """
+
+    if processes is None:
+        processes = os.cpu_count() or 1
+    if num_shards is None:
+        num_shards = processes * 4
+
+    count = count_combinations(total)
+    shard_size = max(1, -(-count // num_shards))
+    shards = [(total, start, start + shard_size, process)
+        for start in range(0, count, shard_size)]
+
+    with multiprocessing.Pool(processes) as pool:
+        return pool.starmap(process_range, shards)
+
+
 class BaseTestCase (unittest.TestCase):
     """
     Each test case sorts the result so that comparison works irrespective of
     the generated order, while at the same time catching errors if duplicate
-    elements are given.
+    elements are given. Results of lazy implementations are converted with
+    `list()` by `list_pairs`.
     """
 
     impl = None
-    list_pairs = property(lambda self: self.impl)
+    list_pairs = property(lambda self: lambda total: list(self.impl(total)))
 
     @classmethod
     def setUpClass(cls):
@@ -97,6 +319,53 @@ class TestCaseByPermuteRecur (BaseTestCase):
 class TestCaseByPermute (BaseTestCase):
     impl = staticmethod(permute)
 
+class TestCaseByPermuteLexicographic (BaseTestCase):
+    impl = staticmethod(permute_lexicographic)
+
+    def test_order(self):
+        for total in range(1, 8):
+            combinations = self.list_pairs(total)
+            self.assertEqual(combinations, sorted(set(combinations)))
+
+    def test_count(self):
+        for total in range(0, 10):
+            self.assertEqual(
+                len(self.list_pairs(total)),
+                count_combinations(total))
+
+    def test_rank_unrank(self):
+        for total in range(1, 8):
+            for index, parens in enumerate(self.list_pairs(total)):
+                self.assertEqual(unrank(total, index), parens)
+                self.assertEqual(rank(parens), index)
+
+    def test_unrank_out_of_range(self):
+        for index in [-1, 5]:
+            with self.assertRaises(IndexError):
+                unrank(3, index)
+
+    def test_rank_invalid(self):
+        for parens in ['', '(', ')(', '(()', '())(', '(a)']:
+            with self.assertRaises(ValueError):
+                rank(parens)
+
+    def test_range(self):
+        self.assertEqual(
+            list(permute_range(3, 1, 4)),
+            self.list_pairs(3)[1:4])
+        self.assertEqual(list(permute_range(3, 4, 10)), ['()()()'])
+        self.assertEqual(list(permute_range(3, 5, 10)), [])
+
+    def test_parallel(self):
+        shards = process_parallel(5, list, processes=2, num_shards=5)
+        self.assertEqual(len(shards), 5)
+        self.assertEqual(sum(shards, []), self.list_pairs(5))
+
+    def test_lazy(self):
+        combinations = permute_lexicographic(20)
+        self.assertEqual(next(combinations), '(' * 20 + ')' * 20)
+        self.assertEqual(count_combinations(20), 6564120420)
+
 
 if __name__ == '__main__':
     unittest.main(verbosity=2)
@@ -6,11 +6,23 @@ Check if two strings have an identical character set.
 Assumes case-insensitivity, and unknown character set.
 
 Example: abbc aabc
+
+Given two file paths as arguments, compares their byte sets instead.
 """
 
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Set, Tuple, \
+    Union
+import io
+import mmap
+import os
+import sys
+import tempfile
 import unittest
 
 
+CharSetSignature = Union[int, Tuple[str, ...]]
+
+
 def has_same_char_set_by_set_cmp(str_1: str, str_2: str) -> bool:
     """
     Let:
@@ -128,6 +140,147 @@ def has_same_char_set_by_char(str_1: str, str_2: str) -> bool:
     return True
 
 
+def char_set_signature(string: str) -> CharSetSignature:
+    """
+    Compact and hashable character set. Latin-1 strings use an integer
+    bitmask with one bit per code point, with a fallback to a sorted tuple of
+    unique characters for wider alphabets. Both kinds never compare equal, and
+    neither do their character sets, since only one has non-Latin-1 chars.
+
+    Let:
+
+    - ``k=len(string)``, ``m=len(char_set_string)``
+
+    Upper-bounds:
+
+    - ``m<=k``
+
+    Then:
+
+    - **Time:** ``O(k)`` -- ``O(k + m log m)`` for wider alphabets
+    - **Space:** ``O(m)``
+    """
+
+    mask = 0
+
+    for char in set(string):
+        code = ord(char)
+
+        if code > 0xFF:
+            return tuple(sorted(set(string)))
+
+        mask |= 1 << code
+
+    return mask
+
+
+def has_same_char_set_by_signature(str_1: str, str_2: str) -> bool:
+    """
+    Let:
+
+    - ``k=len(str_1)``, ``m=len(char_set_str_1)``
+    - ``l=len(str_2)``, ``n=len(char_set_str_2)``
+
+    Upper-bounds:
+
+    - ``m<=k``
+    - ``n<=l``
+
+    Then:
+
+    - **Time:** ``O(k+l)`` -- Latin-1 only
+    - **Space:** ``O(m+n)``
+    """
+
+    return char_set_signature(str_1) == char_set_signature(str_2)
+
+
+def group_by_char_set(strings: Iterable[str]) -> Iterator[List[str]]:
+    """
+    Groups strings with identical character sets, in order of first
+    appearance, by computing each string's signature once instead of
+    comparing string pairs.
+
+    Let:
+
+    - ``n=len(strings)``
+    - ``k=sum(len(string) for string in strings)``
+
+    Then:
+
+    - **Time:** ``O(k)`` -- Latin-1 only
+    - **Space:** ``O(n)`` -- plus the strings
+    """
+
+    groups: Dict[CharSetSignature, List[str]] = {}
+
+    for string in strings:
+        signature = char_set_signature(string)
+        group = groups.get(signature)
+
+        if group is None:
+            groups[signature] = [string]
+        else:
+            group.append(string)
+
+    yield from groups.values()
+
+
+def has_same_char_set_streaming(
+        source_1: BinaryIO,
+        source_2: BinaryIO,
+        chunk_size: int = 2**20,
+        alphabet_size: int = 256) -> bool:
+
+    """
+    Compares the byte sets of two file-like (or memory-mapped) sources,
+    reading them alternately in chunks, and stops as soon as the answer is
+    decided: when an exhausted source lacks a byte seen in the other one, or
+    when both sources have seen every byte in the alphabet.
+
+    Let:
+
+    - ``k=len(source_1)``, ``m=len(char_set_source_1)``
+    - ``l=len(source_2)``, ``n=len(char_set_source_2)``
+    - ``c=chunk_size``
+
+    Upper-bounds:
+
+    - ``m<=alphabet_size``
+    - ``n<=alphabet_size``
+
+    Then:
+
+    - **Time:** ``O(k+l)`` -- worst-case identical byte sets
+    - **Space:** ``O(c)``
+    """
+
+    char_set_1: Set[int] = set()
+    char_set_2: Set[int] = set()
+    is_exhausted_1 = False
+    is_exhausted_2 = False
+
+    while not (is_exhausted_1 and is_exhausted_2):
+        if not is_exhausted_1:
+            chunk_1 = source_1.read(chunk_size)
+            is_exhausted_1 = len(chunk_1) == 0
+            char_set_1.update(chunk_1)
+
+        if not is_exhausted_2:
+            chunk_2 = source_2.read(chunk_size)
+            is_exhausted_2 = len(chunk_2) == 0
+            char_set_2.update(chunk_2)
+
+        if is_exhausted_1 and not (char_set_2 <= char_set_1):
+            return False
+        if is_exhausted_2 and not (char_set_1 <= char_set_2):
+            return False
+        if len(char_set_1) == len(char_set_2) == alphabet_size:
+            return True
+
+    return char_set_1 == char_set_2
+
+
 class BaseTestCase (unittest.TestCase):
     impl = None
     has_same_char_set = property(lambda self: self.impl)
@@ -171,6 +324,97 @@ class TestCaseBySetCmpPartial (BaseTestCase):
 class TestCaseByChar (BaseTestCase):
     impl = staticmethod(has_same_char_set_by_char)
 
+class TestCaseBySignature (BaseTestCase):
+    impl = staticmethod(has_same_char_set_by_signature)
+
+    def test_wide_alphabet(self):
+        self.assertTrue(self.has_same_char_set('€aé€', 'é€a'))
+        self.assertFalse(self.has_same_char_set('€aé', 'aé'))
+
+
+class TestCaseByStreaming (BaseTestCase):
+    # Latin-1 maps each char to a single byte, so byte sets are char sets,
+    # and any other char fails to encode instead of giving a wrong answer.
+    impl = staticmethod(lambda str_1, str_2: has_same_char_set_streaming(
+        io.BytesIO(str_1.encode('latin-1')),
+        io.BytesIO(str_2.encode('latin-1'))))
+
+    def test_chunk_boundaries(self):
+        for (str_1, str_2, expected) in [
+                ('', '', True),
+                ('aabc', 'bcb', False),
+                ('bcb', 'aabc', False),
+                ('baacab', 'abc', True),
+                ('abaacab', 'ddcbd', False)]:
+
+            with self.subTest(str_1=str_1, str_2=str_2):
+                self.assertEqual(
+                    has_same_char_set_streaming(
+                        io.BytesIO(str_1.encode('latin-1')),
+                        io.BytesIO(str_2.encode('latin-1')),
+                        chunk_size=2),
+                    expected)
+
+    def test_latin_1(self):
+        self.assertTrue(self.has_same_char_set('éaé', 'aé'))
+        self.assertFalse(self.has_same_char_set('é', 'è'))
+
+    def test_outside_latin_1(self):
+        with self.assertRaises(UnicodeEncodeError):
+            self.has_same_char_set('€₂', '€⬬')
+
+    def test_early_exit_on_missing_char(self):
+        source_1 = io.BytesIO(b'ab')
+        source_2 = io.BytesIO(b'abc' + b'a' * 1000)
+
+        self.assertFalse(
+            has_same_char_set_streaming(source_1, source_2, chunk_size=4))
+        self.assertLess(source_2.tell(), 100)
+
+    def test_early_exit_on_full_alphabet(self):
+        source_1 = io.BytesIO(b'abab' + b'c' * 1000)
+        source_2 = io.BytesIO(b'baba' + b'd' * 1000)
+
+        self.assertTrue(has_same_char_set_streaming(
+            source_1, source_2, chunk_size=4, alphabet_size=2))
+        self.assertEqual(source_1.tell(), 4)
+        self.assertEqual(source_2.tell(), 4)
+
+    def test_mmap(self):
+        (fd, path) = tempfile.mkstemp()
+
+        try:
+            with os.fdopen(fd, 'wb') as file:
+                file.write(b'baacab')
+
+            with open(path, 'rb') as file:
+                with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) \
+                        as source:
+                    self.assertTrue(has_same_char_set_streaming(
+                        source, io.BytesIO(b'abc'), chunk_size=2))
+        finally:
+            os.remove(path)
+
+
+class TestCaseGroupByCharSet (unittest.TestCase):
+    def test_empty(self):
+        self.assertEqual(list(group_by_char_set([])), [])
+
+    def test_groups(self):
+        self.assertEqual(
+            list(group_by_char_set(
+                ['abbc', 'def', 'aabc', '', 'fed€', 'cba', 'e€fd'])),
+            [['abbc', 'aabc', 'cba'], ['def'], [''], ['fed€', 'e€fd']])
+
 
 if __name__ == '__main__':
-    unittest.main(verbosity=2)
+    if len(sys.argv) == 3:
+        with open(sys.argv[1], 'rb') as file_1, \
+                open(sys.argv[2], 'rb') as file_2:
+
+            if has_same_char_set_streaming(file_1, file_2):
+                print('YES')
+            else:
+                print('NO')
+    else:
+        unittest.main(verbosity=2)
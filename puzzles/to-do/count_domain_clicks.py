@@ -5,25 +5,86 @@
 Count and aggregate the number of clicks per domain, and all top-level domains
 derived from it. The input is a list of CSV lines, each with the count in the
 first column, and the domain in the second column.
+
+Given file paths as arguments, counts the clicks in those files instead.
 """
 
 from collections import defaultdict
-import re
-from typing import Dict, Iterable, Iterator
+from dataclasses import dataclass, field
+import argparse
+import csv
+import functools
+import hashlib
+import heapq
+import itertools
+import multiprocessing
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from typing import BinaryIO, Callable, Dict, Iterable, Iterator, List, \
+    Optional, Tuple
 import unittest
 
 
 def enumerate_domains(domain: str) -> Iterator[str]:
     """
     Time: O(n), where n=number of domain parts
-    Space: O(1), assuming tail-call optimization for recursion
+    Space: O(1)
     """
 
     yield domain
-    top_domain = re.sub(r'^[^.]+\.', '', domain)
+    start = 0
+
+    while True:
+        end = domain.find('.', start)
+
+        # No more parts, or an empty part.
+        if end <= start:
+            break
+
+        start = end + 1
+        yield domain[start:]
+
+
+# Unique hosts are few compared to lines in real traffic, so this covers
+# most of the skewed distribution while still bounding memory.
+DOMAIN_CACHE_SIZE = 2**16
+
+
+def make_enumerate_domains_cached(
+        cache_size: Optional[int]) -> Callable[[str], Tuple[str, ...]]:
+
+    """
+    Memoized `enumerate_domains`, in an LRU cache bounded to `cache_size`
+    domains (unbounded if none). Hit and miss statistics, to size the cache,
+    are in `cache_info()`.
+
+    Time: O(1) on a hit, O(n) on a miss, where n=number of domain parts
+    Space: O(c * n), where c=cache_size
+    """
+
+    @functools.lru_cache(maxsize=cache_size)
+    def enumerate_domains_cached(domain: str) -> Tuple[str, ...]:
+        return tuple(enumerate_domains(domain))
+
+    return enumerate_domains_cached
+
+
+enumerate_domains_cached = make_enumerate_domains_cached(DOMAIN_CACHE_SIZE)
+
+
+def parse_clicks(
+        count_domain_csv_lines: Iterable[str]) -> Iterator[Tuple[int, str]]:
+
+    for row in csv.reader(count_domain_csv_lines):
+        if len(row) == 0:
+            continue
 
-    if len(top_domain) != len(domain):
-        yield from enumerate_domains(top_domain)
+        (count_str, domain) = row
+        yield (int(count_str), domain)
 
 
 def count_clicks(count_domain_csv_lines: Iterable[str]) -> Dict[str, int]:
@@ -34,17 +95,678 @@ def count_clicks(count_domain_csv_lines: Iterable[str]) -> Dict[str, int]:
 
     count_per_domain: Dict[str, int] = defaultdict(lambda: 0)
 
-    for count_domain_csv_live in count_domain_csv_lines:
-        # TODO use the `csv` module for parsing CSV lines
-        (count_str, orig_domain) = count_domain_csv_live.split(',')
-        count = int(count_str)
-
-        for domain in enumerate_domains(orig_domain):
+    for (count, orig_domain) in parse_clicks(count_domain_csv_lines):
+        for domain in enumerate_domains_cached(orig_domain):
             count_per_domain[domain] += count
 
     return count_per_domain
 
 
+@dataclass
+class DomainTrieNode:
+    domain: str
+    count: int = 0
+    total: int = 0
+    children: Dict[str, 'DomainTrieNode'] = field(default_factory=dict)
+    children_by_total: List['DomainTrieNode'] = field(default_factory=list)
+    top_descendants_by_depth: Optional[
+        Dict[int, List['DomainTrieNode']]] = None
+
+
+# Descendants cached per level below each node, past its children, for top-k
+# queries by level. Larger queries fall back to a slower search.
+TOP_K_PER_LEVEL = 100
+
+
+class DomainTrie:
+    """
+    Domains keyed by their reversed parts, eg. `com`, `example`, `www`, with
+    each node counting the clicks for its exact domain only, until rolled up.
+    """
+
+    def __init__(self, top_k_per_level: int = TOP_K_PER_LEVEL):
+        self.root = DomainTrieNode(domain='')
+        self.top_k_per_level = top_k_per_level
+
+    @staticmethod
+    def enumerate_path(domain: str) -> Iterator[Tuple[str, str]]:
+        """
+        Parts and their domains, from the top-level domain down.
+        """
+
+        parent_domain = None
+
+        for sub_domain in reversed(list(enumerate_domains(domain))):
+            if parent_domain is None:
+                yield (sub_domain, sub_domain)
+            else:
+                yield (sub_domain[:-len(parent_domain) - 1], sub_domain)
+
+            parent_domain = sub_domain
+
+    def add(self, domain: str, count: int) -> None:
+        """
+        Time: O(m), where m=number of domain parts
+        Space: O(m)
+        """
+
+        node = self.root
+
+        for (part, sub_domain) in self.enumerate_path(domain):
+            child = node.children.get(part)
+
+            if child is None:
+                child = DomainTrieNode(domain=sub_domain)
+                node.children[part] = child
+
+            node = child
+
+        node.count += count
+
+    def find(self, domain: str) -> Optional[DomainTrieNode]:
+        """
+        Time: O(m), where m=number of domain parts
+        Space: O(m)
+        """
+
+        node: Optional[DomainTrieNode] = self.root
+
+        for (part, _) in self.enumerate_path(domain):
+            if node is None:
+                break
+
+            node = node.children.get(part)
+
+        return node
+
+    def rollup(self) -> Dict[str, int]:
+        """
+        Totals for each domain, including all of its sub-domains, in a
+        single post-order pass. Also orders each node's children by total,
+        for top-k queries.
+
+        Time: O(u log b), where u=number of trie nodes, b=maximum children
+        Space: O(u)
+        """
+
+        count_per_domain: Dict[str, int] = {}
+
+        def visit(node: DomainTrieNode) -> int:
+            node.total = node.count
+            node.top_descendants_by_depth = None
+
+            if len(node.children) == 0:
+                return node.total
+
+            for child in node.children.values():
+                node.total += visit(child)
+
+                # Recorded by the parent, so that the root isn't, since its
+                # domain is indistinguishable from an empty domain part.
+                count_per_domain[child.domain] = child.total
+
+            node.children_by_total = sorted(
+                node.children.values(),
+                key=lambda child: child.total,
+                reverse=True)
+
+            return node.total
+
+        visit(self.root)
+        return count_per_domain
+
+    def find_top_descendants(
+            self,
+            node: DomainTrieNode,
+            depth: int) -> List[DomainTrieNode]:
+
+        """
+        Descendants `depth` levels below a rolled-up node, ordered by total,
+        and limited to `top_k_per_level` past its children. Computed on first
+        use from its children's own, via a slice for a single child, a sort
+        for few, or a bounded heap, and then cached.
+
+        Time: O(s log k) the first time, where s=number of sub-domains up to
+            that depth, k=top_k_per_level, O(1) after
+        Space: O(s k / b), where b=minimum children
+        """
+
+        if depth == 1:
+            return node.children_by_total
+
+        if node.top_descendants_by_depth is None:
+            node.top_descendants_by_depth = {}
+
+        top_descendants = node.top_descendants_by_depth.get(depth)
+
+        if top_descendants is not None:
+            return top_descendants
+
+        level_descendants = [descendants
+            for descendants in (
+                self.find_top_descendants(child, depth - 1)
+                for child in node.children_by_total)
+            if len(descendants) > 0]
+
+        descendants = itertools.chain.from_iterable(level_descendants)
+        key = lambda descendant: descendant.total
+
+        if len(level_descendants) == 1:
+            top_descendants = level_descendants[0][:self.top_k_per_level]
+        elif sum(map(len, level_descendants)) <= 4 * self.top_k_per_level:
+            top_descendants = sorted(descendants, key=key, reverse=True)[
+                :self.top_k_per_level]
+        else:
+            top_descendants = heapq.nlargest(
+                self.top_k_per_level, descendants, key=key)
+
+        node.top_descendants_by_depth[depth] = top_descendants
+        return top_descendants
+
+
+class ClickCounts (dict):
+    """
+    Click counts per domain, as a plain dictionary, backed by a rolled-up
+    trie for top-k queries. Since click counts are non-negative, a domain's
+    total is never less than any of its sub-domains' totals, which makes the
+    trie a max-heap.
+    """
+
+    def __init__(self, trie: DomainTrie):
+        super().__init__(trie.rollup())
+        self.trie = trie
+
+    def top(
+            self,
+            k: int,
+            domain: Optional[str] = None,
+            level: Optional[int] = None) -> List[Tuple[str, int]]:
+
+        """
+        Most clicked sub-domains of `domain` (all domains if not given), and
+        optionally only those with `level` parts in total, eg. 1 for
+        top-level domains. With a level one below `domain`, or k within the
+        trie's `top_k_per_level`, it's a prefix of that level's cached top
+        descendants. Otherwise, it's a best-first search over the trie,
+        starting each node's children from the highest total, and only
+        visiting the next sibling when the previous one is taken out of the
+        heap.
+
+        Time: O(k log k) without a level, O(k) with a level once cached --
+            with a level beyond `top_k_per_level`, it's O(s log s) instead,
+            where s=number of sub-domains up to that level
+        Space: O(k), or O(s)
+        """
+
+        if domain is None:
+            (start, start_level) = (self.trie.root, 0)
+        else:
+            start = self.trie.find(domain)
+            start_level = len(list(enumerate_domains(domain)))
+
+        if (start is None) or (k <= 0):
+            return []
+
+        if level is not None:
+            if level <= start_level:
+                return []
+
+            if (level == start_level + 1) or (k <= self.trie.top_k_per_level):
+                return [(node.domain, node.total) for node
+                    in self.trie.find_top_descendants(
+                        start, level - start_level)[:k]]
+
+        top_domains: List[Tuple[str, int]] = []
+        heap: List[Tuple[int, int, List[DomainTrieNode], int, int]] = []
+        tie_breaker = itertools.count()
+
+        def push(siblings: List[DomainTrieNode], i: int, level: int) -> None:
+            if i < len(siblings):
+                heapq.heappush(heap, (
+                    -siblings[i].total, next(tie_breaker), siblings, i, level))
+
+        push(start.children_by_total, 0, start_level + 1)
+
+        while (len(heap) > 0) and (len(top_domains) < k):
+            (_, _, siblings, i, node_level) = heapq.heappop(heap)
+            node = siblings[i]
+            push(siblings, i + 1, node_level)
+
+            if (level is None) or (node_level == level):
+                top_domains.append((node.domain, node.total))
+            if (level is None) or (node_level < level):
+                push(node.children_by_total, 0, node_level + 1)
+
+        return top_domains
+
+
+def count_exact_clicks(
+        count_domain_csv_lines: Iterable[str]) -> Dict[str, int]:
+
+    """
+    Time: O(n), where n=number of CSV lines
+    Space: O(u), where u=number of unique domains
+    """
+
+    exact_count_per_domain: Dict[str, int] = defaultdict(lambda: 0)
+
+    for (count, domain) in parse_clicks(count_domain_csv_lines):
+        exact_count_per_domain[domain] += count
+
+    return exact_count_per_domain
+
+
+def rollup_clicks(exact_count_per_domain: Dict[str, int]) -> ClickCounts:
+    """
+    Time: O(u * m), where u=number of unique domains, m=number of domain parts
+    Space: O(u * m)
+    """
+
+    trie = DomainTrie()
+
+    for domain, count in exact_count_per_domain.items():
+        trie.add(domain, count)
+
+    return ClickCounts(trie)
+
+
+def count_clicks_rollup(
+        count_domain_csv_lines: Iterable[str]) -> ClickCounts:
+
+    """
+    Sums counts per exact domain first, and only then rolls them up to the
+    parent domains via a trie, so that most of the work scales with the
+    number of unique domains instead of lines.
+
+    Time: O(n + u * m), where n=number of CSV lines, u=number of unique
+        domains, m=number of domain parts
+    Space: O(u * m)
+    """
+
+    return rollup_clicks(count_exact_clicks(count_domain_csv_lines))
+
+
+def read_shard_lines(path: str, start: int, end: int) -> Iterator[str]:
+    """
+    Lines starting within the byte range ``[start, end)``, so that shards
+    with arbitrary boundaries cover each line exactly once.
+    """
+
+    with open(path, 'rb') as file:
+        if start > 0:
+            # Skip the line started in the previous shard, if any.
+            file.seek(start - 1)
+            position = start - 1 + len(file.readline())
+        else:
+            position = 0
+
+        while position < end:
+            line = file.readline()
+
+            if len(line) == 0:
+                break
+
+            position += len(line)
+            yield line.decode('utf-8')
+
+
+def count_shards_clicks(
+        path: str,
+        shards: List[Tuple[int, int]]) -> Dict[str, int]:
+
+    """
+    Counts several shards into a single counter, so that a process returns
+    only one counter, instead of one per shard to be merged elsewhere.
+    """
+
+    return dict(count_exact_clicks(itertools.chain.from_iterable(
+        read_shard_lines(path, start, end) for (start, end) in shards)))
+
+
+def merge_clicks(
+        count_per_domain_1: Dict[str, int],
+        count_per_domain_2: Dict[str, int]) -> Dict[str, int]:
+
+    """
+    Merges the smaller counter into the larger one, in-place.
+
+    Time: O(min(k, l)), where k, l=number of domains in each counter
+    Space: O(1)
+    """
+
+    if len(count_per_domain_1) < len(count_per_domain_2):
+        (count_per_domain_1, count_per_domain_2) = \
+            (count_per_domain_2, count_per_domain_1)
+
+    for domain, count in count_per_domain_2.items():
+        count_per_domain_1[domain] = count_per_domain_1.get(domain, 0) + count
+
+    return count_per_domain_1
+
+
+def fold_merge_clicks(counters: List[Dict[str, int]]) -> Dict[str, int]:
+    """
+    Merges all counters into the largest one, in-place. Done in-process
+    instead of as a tree: serially, merging pairwise in rounds touches every
+    domain at least as many times as folding into the largest counter does,
+    and merging rounds in parallel would send counters to other processes,
+    which costs more than the merge itself.
+
+    Time: O(s - l), where s=total number of domains in all counters,
+        l=number of domains in the largest counter
+    Space: O(1)
+    """
+
+    if len(counters) == 0:
+        return {}
+
+    largest = max(counters, key = len)
+
+    for counter in counters:
+        if counter is not largest:
+            merge_clicks(largest, counter)
+
+    return largest
+
+
+def count_clicks_parallel(
+        path: str,
+        processes: Optional[int] = None,
+        num_shards: Optional[int] = None) -> ClickCounts:
+
+    """
+    Splits a CSV file into byte ranges aligned to line boundaries, counts
+    clicks per exact domain for each group of ranges in a separate process,
+    merges the partial counters into the largest one, and finally rolls up
+    parent domains.
+
+    Time: O(n / p + u * (p + m)), where n=number of CSV lines,
+        u=number of unique domains, m=number of domain parts, p=processes
+    Space: O(u * (p + m))
+    """
+
+    if processes is None:
+        processes = os.cpu_count() or 1
+    if num_shards is None:
+        num_shards = processes
+
+    size = os.path.getsize(path)
+    shard_size = max(1, -(-size // num_shards))
+    shards = [(start, start + shard_size)
+        for start in range(0, size, shard_size)]
+    shard_groups = [(path, shards[i::processes])
+        for i in range(min(processes, len(shards)))]
+
+    with multiprocessing.Pool(processes) as pool:
+        counters = pool.starmap(count_shards_clicks, shard_groups)
+
+    return rollup_clicks(fold_merge_clicks(counters))
+
+
+def count_clicks_file(
+        path: str,
+        buffer_size: int = 2**20,
+        rollup: bool = False) -> Dict[str, int]:
+
+    """
+    Streams a CSV file in large buffered blocks, without loading it whole.
+
+    Time: O(n * m), where n=number of CSV lines, m=number of domain parts
+    Space: O(u * m + b), where u=number of unique domains, b=buffer size
+    """
+
+    with open(path, newline='', buffering=buffer_size) as file:
+        if rollup:
+            return count_clicks_rollup(file)
+        else:
+            return count_clicks(file)
+
+
+class ClickStore:
+    """
+    Persisted click counts per exact domain in SQLite, along with how far
+    each log file has been merged, so that each run only reads and writes
+    what changed since the previous one. Parent domains are rolled up on
+    load.
+    """
+
+    def __init__(self, path: str):
+        self.connection = sqlite3.connect(path)
+
+        with self.connection:
+            self.connection.execute("""
+                CREATE TABLE IF NOT EXISTS clicks (
+                    domain TEXT PRIMARY KEY,
+                    count INTEGER NOT NULL)
+            """)
+            self.connection.execute("""
+                CREATE TABLE IF NOT EXISTS log_offsets (
+                    path TEXT PRIMARY KEY,
+                    device INTEGER NOT NULL,
+                    inode INTEGER NOT NULL,
+                    first_line_hash TEXT,
+                    offset INTEGER NOT NULL)
+            """)
+
+    def __enter__(self) -> 'ClickStore':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def merge(self, exact_count_per_domain: Dict[str, int]) -> None:
+        """
+        Adds counts per exact domain, writing only those domains.
+
+        Time: O(c log u), where c=number of changed domains, u=stored domains
+        Space: O(1)
+        """
+
+        with self.connection:
+            self._upsert(exact_count_per_domain)
+
+    def merge_log(self, path: str) -> int:
+        """
+        Merges the complete lines appended to a log file since it was last
+        merged, and returns how many. A log file that was replaced (different
+        device or inode), copy-truncated (different first line), or that
+        shrank is assumed to have been rotated, and is merged from the start.
+
+        Time: O(n + c log u), where n=number of new lines, c=number of
+            changed domains, u=stored domains
+        Space: O(c)
+        """
+
+        row = self.connection.execute(
+            'SELECT device, inode, first_line_hash, offset FROM log_offsets '
+            'WHERE path = ?',
+            (os.path.abspath(path),)).fetchone()
+
+        offset = 0
+        num_lines = 0
+
+        def read_new_lines(file: BinaryIO) -> Iterator[str]:
+            nonlocal offset, num_lines
+
+            for line in file:
+                # Incomplete line still being written.
+                if not line.endswith(b'\n'):
+                    break
+
+                offset += len(line)
+                num_lines += 1
+                yield line.decode('utf-8')
+
+        with open(path, 'rb') as file:
+            stat = os.fstat(file.fileno())
+            first_line = file.readline()
+            first_line_hash = hashlib.sha1(first_line).hexdigest() \
+                if first_line.endswith(b'\n') else None
+            identity = (stat.st_dev, stat.st_ino, first_line_hash)
+
+            if (row is not None) and (tuple(row[:3]) == identity) \
+                    and (row[3] <= stat.st_size):
+                offset = row[3]
+
+            file.seek(offset)
+            exact_count_per_domain = count_exact_clicks(read_new_lines(file))
+
+        with self.connection:
+            self._upsert(exact_count_per_domain)
+            self.connection.execute(
+                'INSERT OR REPLACE INTO log_offsets '
+                '(path, device, inode, first_line_hash, offset) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (os.path.abspath(path), *identity, offset))
+
+        return num_lines
+
+    def load(self) -> ClickCounts:
+        """
+        Time: O(u * m), where u=stored domains, m=number of domain parts
+        Space: O(u * m)
+        """
+
+        return rollup_clicks(dict(
+            self.connection.execute('SELECT domain, count FROM clicks')))
+
+    def _upsert(self, exact_count_per_domain: Dict[str, int]) -> None:
+        self.connection.executemany(
+            'INSERT INTO clicks (domain, count) VALUES (?, ?) '
+            'ON CONFLICT (domain) DO UPDATE SET count = count + excluded.count',
+            exact_count_per_domain.items())
+
+
+class WindowedClickCounter:
+    """
+    Click counts per domain and parent domain over a sliding time window,
+    kept as a ring of per-bucket counts plus their running totals. The window
+    has the granularity of one bucket: it spans the latest bucket and the
+    ones before it, for a total of `num_buckets`.
+    """
+
+    def __init__(self, window_seconds: float, num_buckets: int = 60):
+        self.bucket_seconds = window_seconds / num_buckets
+        self.buckets: List[Dict[str, int]] = [{} for _ in range(num_buckets)]
+        self.latest_bucket_id: Optional[int] = None
+        self.count_per_domain: Dict[str, int] = {}
+
+    def add(self, timestamp: float, domain: str, count: int = 1) -> bool:
+        """
+        Out of order clicks are counted as long as they're still within the
+        window, otherwise they're dropped and false is returned.
+
+        Time: O(m), where m=number of domain parts, plus expiry
+        Space: O(m)
+        """
+
+        self.advance(timestamp)
+        bucket_id = self.bucket_id(timestamp)
+
+        if bucket_id <= self.latest_bucket_id - len(self.buckets):
+            return False
+
+        bucket = self.buckets[bucket_id % len(self.buckets)]
+
+        for parent_domain in enumerate_domains_cached(domain):
+            bucket[parent_domain] = bucket.get(parent_domain, 0) + count
+            self.count_per_domain[parent_domain] = \
+                self.count_per_domain.get(parent_domain, 0) + count
+
+        return True
+
+    def advance(self, timestamp: float) -> None:
+        """
+        Slides the window forward, expiring buckets that fall out of it.
+        Each bucket's counts are expired only once, so that's O(1) amortized
+        per added count.
+
+        Time: O(b + e), where b=number of buckets, e=expired domain counts
+        Space: O(1)
+        """
+
+        bucket_id = self.bucket_id(timestamp)
+
+        if self.latest_bucket_id is None:
+            self.latest_bucket_id = bucket_id
+            return
+
+        if bucket_id <= self.latest_bucket_id:
+            return
+
+        for expired_id in range(
+                max(self.latest_bucket_id, bucket_id - len(self.buckets)) + 1,
+                bucket_id + 1):
+
+            bucket = self.buckets[expired_id % len(self.buckets)]
+
+            for (domain, count) in bucket.items():
+                total = self.count_per_domain[domain] - count
+
+                if total == 0:
+                    del self.count_per_domain[domain]
+                else:
+                    self.count_per_domain[domain] = total
+
+            bucket.clear()
+
+        self.latest_bucket_id = bucket_id
+
+    def bucket_id(self, timestamp: float) -> int:
+        return int(timestamp // self.bucket_seconds)
+
+    def count(self, domain: str, now: Optional[float] = None) -> int:
+        """
+        Time: O(1), plus expiry when `now` is given
+        Space: O(1)
+        """
+
+        if now is not None:
+            self.advance(now)
+
+        return self.count_per_domain.get(domain, 0)
+
+    def counts(self, now: Optional[float] = None) -> Dict[str, int]:
+        """
+        Time: O(u), where u=unique domains in the window
+        Space: ditto
+        """
+
+        if now is not None:
+            self.advance(now)
+
+        return dict(self.count_per_domain)
+
+
+def generate_click_log(path: str, num_lines: int, seed: int = 0) -> None:
+    """
+    Random CSV click log, with a skewed (Zipf-like) distribution over a fixed
+    set of hosts, as in real traffic.
+    """
+
+    rand = random.Random(seed)
+    tlds = ['com', 'org', 'net', 'io', 'co.uk']
+    hosts = []
+
+    for _ in range(10_000):
+        parts = ['part%d' % rand.randrange(1000)
+            for _ in range(rand.randint(1, 3))]
+        hosts.append('.'.join(parts + [rand.choice(tlds)]))
+
+    weights = [1 / rank for rank in range(1, len(hosts) + 1)]
+    block_size = 100_000
+
+    with open(path, 'w', newline='') as file:
+        for start in range(0, num_lines, block_size):
+            block_hosts = rand.choices(
+                hosts, weights, k=min(block_size, num_lines - start))
+            file.writelines('%d,%s\n' % (rand.randint(1, 100), host)
+                for host in block_hosts)
+
+
 class Test (unittest.TestCase):
     def test_no_lines(self):
         self.assertEqual(count_clicks([]), {})
@@ -76,6 +798,362 @@ class Test (unittest.TestCase):
             'org': 35,
         })
 
+    def test_csv_quoting(self):
+        self.assertEqual(count_clicks(['"10","example.com"', '']), {
+            'com': 10,
+            'example.com': 10,
+        })
+
+    def test_enumerate_empty_parts(self):
+        self.assertEqual(list(enumerate_domains('.com')), ['.com'])
+        self.assertEqual(list(enumerate_domains('a..b')), ['a..b', '.b'])
+        self.assertEqual(list(enumerate_domains('a.')), ['a.', ''])
+
+    def test_rollup(self):
+        count_domain_csv_lines = [
+            '20,example.com',
+            '10,www.example.com',
+            '30,www.python.org',
+            '5,org',
+            '1,a..b',
+            '2,.com',
+            '3,www.example.com',
+            '1,example.com.',
+            '5,',
+        ]
+
+        self.assertEqual(
+            count_clicks_rollup(count_domain_csv_lines),
+            count_clicks(count_domain_csv_lines))
+
+    def test_top(self):
+        count_per_domain = count_clicks_rollup([
+            '20,example.com',
+            '10,www.example.com',
+            '30,www.python.org',
+            '5,org',
+            '8,mail.example.com',
+            '1,a.b.mail.example.com',
+        ])
+
+        self.assertEqual(count_per_domain.top(2), [
+            ('com', 39),
+            ('example.com', 39),
+        ])
+        self.assertEqual(count_per_domain.top(3, level = 2), [
+            ('example.com', 39),
+            ('python.org', 30),
+        ])
+        self.assertEqual(count_per_domain.top(2, 'example.com'), [
+            ('www.example.com', 10),
+            ('mail.example.com', 9),
+        ])
+        self.assertEqual(count_per_domain.top(5, 'com', level = 4), [
+            ('b.mail.example.com', 1),
+        ])
+        self.assertEqual(count_per_domain.top(5, 'example.net'), [])
+        self.assertEqual(count_per_domain.top(0), [])
+
+    def test_top_matches_sorting(self):
+        (fd, path) = tempfile.mkstemp()
+        os.close(fd)
+
+        try:
+            generate_click_log(path, 2000)
+
+            with open(path) as file:
+                trie = DomainTrie(top_k_per_level = 5)
+
+                for domain, count in count_exact_clicks(file).items():
+                    trie.add(domain, count)
+
+                count_per_domain = ClickCounts(trie)
+        finally:
+            os.remove(path)
+
+        # Within the trie's top-k per level, and beyond it.
+        for (k, domain, level) in itertools.product(
+                [3, 10],
+                [None, 'com', 'co.uk'],
+                [None, 1, 2, 3, 4, 9]):
+
+            with self.subTest((k, domain, level)):
+                expected = sorted(
+                    (total for sub_domain, total in count_per_domain.items()
+                        if ((domain is None)
+                            or sub_domain.endswith('.' + domain))
+                        and ((level is None)
+                            or (len(list(enumerate_domains(sub_domain)))
+                                == level))),
+                    reverse = True)[:k]
+
+                self.assertEqual(
+                    [total for (_, total)
+                        in count_per_domain.top(k, domain, level)],
+                    expected)
+
+    def test_rollup_no_lines(self):
+        self.assertEqual(count_clicks_rollup([]), {})
+
+    def test_parallel(self):
+        (fd, path) = tempfile.mkstemp()
+        os.close(fd)
+
+        try:
+            generate_click_log(path, 1000)
+
+            for num_shards in [1, 2, 7, 100, 100_000]:
+                with self.subTest(num_shards):
+                    self.assertEqual(
+                        count_clicks_parallel(path, 2, num_shards),
+                        count_clicks_file(path))
+        finally:
+            os.remove(path)
+
+    def test_parallel_empty_file(self):
+        (fd, path) = tempfile.mkstemp()
+        os.close(fd)
+
+        try:
+            self.assertEqual(count_clicks_parallel(path, 2), {})
+        finally:
+            os.remove(path)
+
+    def test_store(self):
+        (fd, log_path) = tempfile.mkstemp()
+        os.close(fd)
+        (fd, store_path) = tempfile.mkstemp()
+        os.close(fd)
+
+        try:
+            with open(log_path, 'w') as log_file:
+                log_file.write('20,example.com\n10,www.example.com\n5,org')
+
+            with ClickStore(store_path) as store:
+                self.assertEqual(store.merge_log(log_path), 2)
+                self.assertEqual(store.merge_log(log_path), 0)
+
+            with open(log_path, 'a') as log_file:
+                log_file.write('\n30,www.python.org\n')
+
+            with ClickStore(store_path) as store:
+                self.assertEqual(store.merge_log(log_path), 2)
+                store.merge({'org': 1, 'example.com': 2})
+
+                self.assertEqual(store.load(), {
+                    'example.com': 32,
+                    'com': 32,
+                    'www.example.com': 10,
+                    'www.python.org': 30,
+                    'python.org': 30,
+                    'org': 36,
+                })
+
+            with open(log_path, 'w') as log_file:
+                log_file.write('1,com\n')
+
+            with ClickStore(store_path) as store:
+                self.assertEqual(store.merge_log(log_path), 1)
+                self.assertEqual(store.load()['com'], 33)
+
+            # Copy-truncated, and grown past the previous offset.
+            with open(log_path, 'w') as log_file:
+                log_file.write('2,com\n3,com\n4,com\n')
+
+            with ClickStore(store_path) as store:
+                self.assertEqual(store.merge_log(log_path), 3)
+                self.assertEqual(store.load()['com'], 42)
+
+            # Replaced by a new file with the same first line.
+            (fd, rotated_path) = tempfile.mkstemp(
+                dir = os.path.dirname(log_path))
+
+            with open(fd, 'w') as log_file:
+                log_file.write('2,com\n3,com\n4,com\n5,com\n')
+
+            os.replace(rotated_path, log_path)
+
+            with ClickStore(store_path) as store:
+                self.assertEqual(store.merge_log(log_path), 4)
+                self.assertEqual(store.load()['com'], 56)
+        finally:
+            os.remove(log_path)
+            os.remove(store_path)
+
+    def test_window(self):
+        counter = WindowedClickCounter(60, num_buckets = 6)
+
+        self.assertTrue(counter.add(100, 'www.example.com', 2))
+        self.assertTrue(counter.add(125, 'example.com'))
+        self.assertTrue(counter.add(115, 'python.org', 5))
+
+        self.assertEqual(counter.counts(), {
+            'www.example.com': 2,
+            'example.com': 3,
+            'com': 3,
+            'python.org': 5,
+            'org': 5,
+        })
+
+        self.assertEqual(counter.count('com', now = 159), 3)
+        self.assertEqual(counter.count('com', now = 160), 1)
+        self.assertEqual(counter.count('org', now = 160), 5)
+        self.assertFalse(counter.add(109, 'org'))
+        self.assertEqual(counter.counts(now = 180), {})
+        self.assertEqual(counter.count('com', now = 10_000), 0)
+
+    def test_window_matches_rescan(self):
+        rand = random.Random(0)
+        hosts = ['a.com', 'b.a.com', 'c.org', 'd.c.org', 'e.net']
+        counter = WindowedClickCounter(100, num_buckets = 10)
+        clicks = []
+        timestamp = 0.0
+
+        for _ in range(2000):
+            timestamp += rand.expovariate(1 / 3)
+
+            # Occasionally out of order, or too old.
+            click_timestamp = timestamp - rand.choice([0, 0, 0, 25, 200])
+            click = (click_timestamp, rand.choice(hosts), rand.randint(1, 5))
+
+            if counter.add(*click):
+                clicks.append(click)
+
+            window_start = (counter.latest_bucket_id - 9) * 10
+            expected = count_clicks('%d,%s' % (count, domain)
+                for (click_timestamp, domain, count) in clicks
+                if click_timestamp >= window_start)
+
+            self.assertEqual(counter.counts(), expected)
+
+    def test_enumerate_domains_cached(self):
+        enumerate_domains_cached = make_enumerate_domains_cached(1)
+
+        for domain in ['a.example.com', 'a.example.com', 'b.example.com',
+                'a.example.com']:
+
+            self.assertEqual(
+                enumerate_domains_cached(domain),
+                tuple(enumerate_domains(domain)))
+
+        info = enumerate_domains_cached.cache_info()
+        self.assertEqual((info.hits, info.misses, info.maxsize), (1, 3, 1))
+
+    def test_fold_merge(self):
+        self.assertEqual(fold_merge_clicks([]), {})
+
+        counters = [{'a': 1}, {'a': 2, 'b': 1}, {'c': 3}, {}, {'b': 4}]
+        self.assertEqual(
+            fold_merge_clicks(counters),
+            {'a': 3, 'b': 5, 'c': 3})
+
+    def test_file(self):
+        (fd, path) = tempfile.mkstemp()
+        os.close(fd)
+
+        try:
+            generate_click_log(path, 1000)
+
+            with open(path) as file:
+                self.assertEqual(
+                    count_clicks_file(path, buffer_size = 64),
+                    count_clicks(file.read().splitlines()))
+                self.assertEqual(
+                    count_clicks_file(path, rollup = True),
+                    count_clicks_file(path))
+        finally:
+            os.remove(path)
+
 
 if __name__ == '__main__':
-    unittest.main(verbosity = 2)
+    if len(sys.argv) <= 1:
+        unittest.main(verbosity = 2)
+    else:
+        parser = argparse.ArgumentParser(
+            description = __doc__,
+            formatter_class = argparse.RawDescriptionHelpFormatter)
+        parser.add_argument('paths', nargs = '*', metavar = 'PATH')
+        parser.add_argument('--benchmark', type = int, metavar = 'LINES',
+            help = 'time counting a generated log with this many lines')
+        parser.add_argument('--rollup', action = 'store_true',
+            help = 'sum exact domains first, then roll up parent domains')
+        parser.add_argument('--processes', type = int, default = 1,
+            help = 'split files into shards across processes, with rollup')
+        parser.add_argument('--top', type = int, metavar = 'K',
+            help = 'only the top domains overall and per top-level domain')
+        parser.add_argument('--store', metavar = 'PATH',
+            help = 'merge only new lines into stored counts, and show those')
+        parser.add_argument('--cache-stats', action = 'store_true',
+            help = 'show domain enumeration cache hits and misses')
+        parser.add_argument('--cache-size', type = int,
+            default = DOMAIN_CACHE_SIZE, metavar = 'DOMAINS',
+            help = 'domain enumeration cache size, default %(default)s')
+        args = parser.parse_args()
+
+        # Only counting line by line enumerates domains. Other modes roll up
+        # unique domains instead, or count in other processes.
+        if (args.cache_stats
+                or (args.cache_size != DOMAIN_CACHE_SIZE)) and (
+                args.rollup
+                or (args.top is not None)
+                or (args.processes > 1)
+                or (args.store is not None)):
+
+            parser.error('domain enumeration cache options only apply when '
+                'counting line by line, without --rollup, --top, '
+                '--processes, or --store')
+
+        enumerate_domains_cached = make_enumerate_domains_cached(
+            args.cache_size)
+
+        def count_file_clicks(path: str) -> Dict[str, int]:
+            if args.processes > 1:
+                return count_clicks_parallel(path, args.processes)
+            else:
+                return count_clicks_file(
+                    path, rollup = args.rollup or (args.top is not None))
+
+        if args.store is None:
+            counts = [count_file_clicks(path) for path in args.paths]
+        else:
+            with ClickStore(args.store) as store:
+                for path in args.paths:
+                    store.merge_log(path)
+
+                counts = [store.load()]
+
+        for count_per_domain in counts:
+            if isinstance(count_per_domain, ClickCounts) \
+                    and (args.top is not None):
+
+                top_domains = count_per_domain.top(args.top)
+
+                for (tld, _) in count_per_domain.top(len(count_per_domain),
+                        level = 1):
+                    top_domains.extend(count_per_domain.top(args.top, tld))
+            else:
+                top_domains = list(count_per_domain.items())
+
+            for domain, count in top_domains:
+                print('%d,%s' % (count, domain))
+
+        if args.benchmark is not None:
+            (fd, path) = tempfile.mkstemp(suffix = '.csv')
+            os.close(fd)
+
+            try:
+                generate_click_log(path, args.benchmark)
+                start = time.perf_counter()
+                count_per_domain = count_file_clicks(path)
+                seconds = time.perf_counter() - start
+
+                print('%d lines, %d domains: %.2f s, %.0f lines/s' % (
+                    args.benchmark,
+                    len(count_per_domain),
+                    seconds,
+                    args.benchmark / seconds))
+            finally:
+                os.remove(path)
+
+        if args.cache_stats:
+            print(enumerate_domains_cached.cache_info(), file = sys.stderr)
@@ -9,14 +9,31 @@ Find the stranger (celebrity) in minimum number of questions.
 
 Assumption: a person is represented by a consecutive non-negative integer,
 starting with zero `0`.
+
+Given party sizes as arguments, reports the number of questions asked by each
+implementation for a random party of each size instead.
 """
 
 from functools import partial
-from typing import Callable, List, Optional
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, \
+    Tuple
+import asyncio
+import itertools
+import os
+import random
+import sys
+import tempfile
+import time
 import unittest
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 
 KnowsFunction = Callable[[int, int], bool]
+AsyncKnowsFunction = Callable[[int, int], Awaitable[bool]]
 
 
 def find_celebrity_simple(
@@ -87,6 +104,146 @@ def find_celebrity_memory(
     return None
 
 
+def find_celebrity_elimination(
+        people: List[int],
+        knows: KnowsFunction) -> Optional[int]:
+
+    """
+    Each question eliminates one candidate: if A knows B then A isn't the
+    celebrity, otherwise B isn't. The last candidate is then verified.
+
+    Time: O(n), at most 3(n-1) questions
+    Space: O(1)
+    """
+
+    if len(people) <= 1:
+        return None
+
+    candidate = people[0]
+
+    for other in people[1:]:
+        if knows(candidate, other):
+            candidate = other
+
+    for other in people:
+        if other == candidate:
+            continue
+        if knows(candidate, other) or not knows(other, candidate):
+            return None
+
+    return candidate
+
+
+async def find_celebrity_async(
+        people: List[int],
+        knows: AsyncKnowsFunction,
+        concurrency: int = 64) -> Optional[int]:
+
+    """
+    Candidates are eliminated in a tournament, asking each round's pairwise
+    questions concurrently, and the last candidate is verified with all its
+    questions asked concurrently too. At most `concurrency` questions are
+    pending at any time.
+
+    Time: O(n), in O(log n) round-trips given enough concurrency
+    Space: O(n)
+    """
+
+    if len(people) <= 1:
+        return None
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def ask(person_1: int, person_2: int) -> bool:
+        async with semaphore:
+            return await knows(person_1, person_2)
+
+    candidates = list(people)
+
+    while len(candidates) > 1:
+        pairs = list(zip(candidates[0::2], candidates[1::2]))
+        answers = await asyncio.gather(
+            *(ask(person, other) for person, other in pairs))
+
+        next_candidates = [other if answer else person
+            for (person, other), answer in zip(pairs, answers)]
+
+        if len(candidates) % 2 != 0:
+            next_candidates.append(candidates[-1])
+
+        candidates = next_candidates
+
+    candidate = candidates[0]
+    others = [other for other in people if other != candidate]
+
+    (knows_others, known_by_others) = await asyncio.gather(
+        asyncio.gather(*(ask(candidate, other) for other in others)),
+        asyncio.gather(*(ask(other, candidate) for other in others)))
+
+    if any(knows_others) or not all(known_by_others):
+        return None
+    else:
+        return candidate
+
+
+class KnowsOracle:
+    """
+    Wraps a `knows` function to count and memoize questions, since each one
+    may be a costly lookup.
+    """
+
+    def __init__(self, knows: KnowsFunction):
+        self.knows = knows
+        self.answers: Dict[Tuple[int, int], bool] = {}
+        self.num_calls = 0
+
+    @property
+    def num_queries(self) -> int:
+        return len(self.answers)
+
+    def __call__(self, person_1: int, person_2: int) -> bool:
+        self.num_calls += 1
+        answer = self.answers.get((person_1, person_2))
+
+        if answer is None:
+            answer = self.knows(person_1, person_2)
+            self.answers[(person_1, person_2)] = answer
+
+        return answer
+
+
+def make_party(
+        num_people: int,
+        celebrity: Optional[int],
+        knows_rate: float = 0.5,
+        seed: int = 0) -> List[List[bool]]:
+
+    """
+    Random acquaintances, with everyone knowing the celebrity, if any, and
+    the celebrity knowing no one.
+    """
+
+    rand = random.Random(seed)
+    known_matrix = [[rand.random() < knows_rate for _ in range(num_people)]
+        for _ in range(num_people)]
+
+    if celebrity is not None:
+        for person in range(num_people):
+            known_matrix[person][celebrity] = True
+            known_matrix[celebrity][person] = False
+
+    return known_matrix
+
+
+def count_queries(
+        find_impl: Callable[[List[int], KnowsFunction], Optional[int]],
+        known_matrix: List[List[bool]]) -> int:
+
+    knows = KnowsOracle(partial(knows_matrix, known_matrix = known_matrix))
+    find_impl(list(range(len(known_matrix))), knows)
+    return knows.num_queries
+
+
 def knows_matrix(person_1, person_2, known_matrix: List[List[bool]]) -> bool:
     if person_1 == person_2:
         return True
@@ -94,10 +251,167 @@ def knows_matrix(person_1, person_2, known_matrix: List[List[bool]]) -> bool:
         return known_matrix[person_1][person_2]
 
 
+class PackedKnownMatrix:
+    """
+    Acquaintance matrix with one bit per pair of people, packed row by row
+    via NumPy, instead of a list of lists of booleans.
+    Saved as a `.npy` file, which can be loaded memory-mapped.
+    Whether people know themselves, ie. the diagonal, is ignored.
+    """
+
+    def __init__(self, packed: 'numpy.ndarray'):
+        if numpy is None:
+            raise ImportError('NumPy is required for packed matrices')
+
+        self.packed = packed
+
+    @classmethod
+    def from_lists(cls, known_matrix: List[List[bool]]) -> 'PackedKnownMatrix':
+        return cls.from_array(numpy.array(
+            [[bool(knows) for knows in row] for row in known_matrix],
+            dtype=bool).reshape(len(known_matrix), len(known_matrix)))
+
+    @classmethod
+    def from_array(
+            cls,
+            known: 'numpy.ndarray',
+            block_rows: int = 4096) -> 'PackedKnownMatrix':
+
+        """
+        Packs a square boolean array, such as a memory-mapped one, in blocks
+        of rows, so that only one block is ever unpacked in memory at once.
+        """
+
+        if numpy is None:
+            raise ImportError('NumPy is required for packed matrices')
+
+        num_people = len(known)
+        packed = numpy.zeros((num_people, -(-num_people // 8)), numpy.uint8)
+
+        for start in range(0, num_people, block_rows):
+            packed[start:start + block_rows] = numpy.packbits(
+                numpy.asarray(known[start:start + block_rows], dtype=bool),
+                axis=1)
+
+        return cls(packed)
+
+    @classmethod
+    def from_edges(
+            cls,
+            num_people: int,
+            edges: Iterable[Tuple[int, int]],
+            block_edges: int = 2**16) -> 'PackedKnownMatrix':
+
+        """
+        Packs pairs of a person and someone they know, in blocks of pairs,
+        without ever holding an unpacked matrix.
+        """
+
+        if numpy is None:
+            raise ImportError('NumPy is required for packed matrices')
+
+        packed = numpy.zeros((num_people, -(-num_people // 8)), numpy.uint8)
+        edges = iter(edges)
+
+        while True:
+            block = numpy.array(
+                list(itertools.islice(edges, block_edges)),
+                dtype=numpy.int64).reshape(-1, 2)
+
+            if len(block) == 0:
+                break
+
+            (people, others) = (block[:, 0], block[:, 1])
+            numpy.bitwise_or.at(
+                packed,
+                (people, others // 8),
+                (1 << (7 - (others % 8))).astype(numpy.uint8))
+
+        return cls(packed)
+
+    @classmethod
+    def load(cls, path: str) -> 'PackedKnownMatrix':
+        return cls(numpy.load(path, mmap_mode='r'))
+
+    def save(self, path: str) -> None:
+        numpy.save(path, self.packed)
+
+    def __len__(self) -> int:
+        return self.packed.shape[0]
+
+    def knows(self, person_1: int, person_2: int) -> bool:
+        if person_1 == person_2:
+            return True
+
+        byte = self.packed[person_1, person_2 // 8]
+        return bool((byte >> (7 - (person_2 % 8))) & 1)
+
+    def known_counts(self, block_rows: int = 4096) -> 'numpy.ndarray':
+        """
+        Number of other people each person knows, ie. the row sums without
+        the diagonal, counted in blocks of rows to bound memory when
+        memory-mapped.
+        """
+
+        counts = numpy.zeros(len(self), dtype=numpy.int64)
+
+        for start in range(0, len(self), block_rows):
+            block = self.packed[start:start + block_rows]
+            people = numpy.arange(start, start + len(block))
+            knows_self = (block[numpy.arange(len(block)), people // 8]
+                >> (7 - (people % 8))) & 1
+
+            counts[start:start + block_rows] = \
+                _POPCOUNT[block].sum(axis=1, dtype=numpy.int64) - knows_self
+
+        return counts
+
+    def knowers_count(self, person: int) -> int:
+        """
+        Number of other people who know a person, ie. a column sum without
+        the diagonal.
+        """
+
+        column = (self.packed[:, person // 8] >> (7 - (person % 8))) & 1
+        return int(column.sum(dtype=numpy.int64)) - int(column[person])
+
+
+def find_celebrity_vectorized(matrix: PackedKnownMatrix) -> Optional[int]:
+    """
+    The celebrity knows no one, so it's the only person with a zero row sum:
+    two such people wouldn't know each other, and so neither is known by
+    everyone. Only that one column sum is then needed.
+
+    Time: O(n^2), vectorized over n^2/8 bytes, without any `knows` calls
+    Space: O(n)
+    """
+
+    if len(matrix) <= 1:
+        return None
+
+    (candidates,) = numpy.nonzero(matrix.known_counts() == 0)
+
+    if len(candidates) != 1:
+        return None
+
+    candidate = int(candidates[0])
+
+    if matrix.knowers_count(candidate) == (len(matrix) - 1):
+        return candidate
+    else:
+        return None
+
+
+if numpy is not None:
+    _POPCOUNT = numpy.array(
+        [bin(byte).count('1') for byte in range(256)], dtype=numpy.uint8)
+
+
 class Test (unittest.TestCase):
     find_impls = {
         find_celebrity_simple,
         find_celebrity_memory,
+        find_celebrity_elimination,
     }
 
     def test_all_know_celebrity(self):
@@ -147,6 +461,180 @@ class Test (unittest.TestCase):
             with self.subTest(find_impl):
                 self.assertEqual(find_impl(people, knows), None)
 
+    def test_random_parties(self):
+        for num_people in range(2, 12):
+            for celebrity in [0, num_people // 2, num_people - 1]:
+                known_matrix = make_party(
+                    num_people, celebrity, seed = num_people)
+                people = list(range(num_people))
+                knows = partial(knows_matrix, known_matrix = known_matrix)
+
+                for find_impl in self.find_impls:
+                    with self.subTest((find_impl, num_people, celebrity)):
+                        self.assertEqual(find_impl(people, knows), celebrity)
+
+    def test_elimination_queries(self):
+        for num_people in range(2, 50):
+            known_matrix = make_party(
+                num_people, num_people // 3, seed = num_people)
+
+            self.assertLessEqual(
+                count_queries(find_celebrity_elimination, known_matrix),
+                3 * (num_people - 1))
+
+    def test_async(self):
+        for num_people in range(0, 12):
+            for celebrity in [None, 0, num_people // 2, num_people - 1]:
+                if num_people < 2:
+                    celebrity = None
+
+                known_matrix = make_party(
+                    num_people, celebrity, knows_rate = 1, seed = num_people)
+
+                async def knows(person_1: int, person_2: int) -> bool:
+                    await asyncio.sleep(0)
+                    return knows_matrix(person_1, person_2, known_matrix)
+
+                with self.subTest((num_people, celebrity)):
+                    self.assertEqual(
+                        asyncio.run(find_celebrity_async(
+                            list(range(num_people)), knows, concurrency = 3)),
+                        celebrity)
+
+    def test_async_concurrency(self):
+        num_people = 64
+        delay = 0.01
+        known_matrix = make_party(num_people, 5)
+        pending = 0
+        max_pending = 0
+
+        async def knows(person_1: int, person_2: int) -> bool:
+            nonlocal pending, max_pending
+            pending += 1
+            max_pending = max(max_pending, pending)
+            await asyncio.sleep(delay)
+            pending -= 1
+            return knows_matrix(person_1, person_2, known_matrix)
+
+        start = time.monotonic()
+        celebrity = asyncio.run(find_celebrity_async(
+            list(range(num_people)), knows, concurrency = 32))
+
+        self.assertEqual(celebrity, 5)
+        self.assertEqual(max_pending, 32)
+        self.assertLess(
+            time.monotonic() - start, (num_people - 1) * delay)
+
+    @unittest.skipIf(numpy is None, 'NumPy not available')
+    def test_packed_matrix(self):
+        for num_people in range(0, 20):
+            for celebrity in [None, 0, num_people // 2, num_people - 1]:
+                if num_people < 2:
+                    celebrity = None
+
+                known_matrix = make_party(
+                    num_people, celebrity, knows_rate = 0.9, seed = num_people)
+                matrix = PackedKnownMatrix.from_lists(known_matrix)
+                people = list(range(num_people))
+                knows = partial(knows_matrix, known_matrix = known_matrix)
+
+                with self.subTest((num_people, celebrity)):
+                    self.assertEqual(
+                        find_celebrity_vectorized(matrix),
+                        find_celebrity_elimination(people, knows))
+                    self.assertEqual(
+                        find_celebrity_elimination(people, matrix.knows),
+                        find_celebrity_elimination(people, knows))
+
+    @unittest.skipIf(numpy is None, 'NumPy not available')
+    def test_packed_matrix_ignores_diagonal(self):
+        for num_people in range(2, 20):
+            known = numpy.zeros((num_people, num_people), dtype=bool)
+            known[:, num_people // 2] = True
+            numpy.fill_diagonal(known, True)
+
+            with self.subTest(num_people):
+                self.assertEqual(
+                    find_celebrity_vectorized(
+                        PackedKnownMatrix(numpy.packbits(known, axis=1))),
+                    num_people // 2)
+
+    @unittest.skipIf(numpy is None, 'NumPy not available')
+    def test_packed_matrix_builders(self):
+        known_matrix = make_party(21, 4, seed = 21)
+        expected = PackedKnownMatrix.from_lists(known_matrix).packed.tolist()
+        edges = ((person, other)
+            for person in range(21)
+            for other in range(21)
+            if known_matrix[person][other])
+
+        self.assertEqual(
+            PackedKnownMatrix.from_array(
+                numpy.array(known_matrix), block_rows = 4).packed.tolist(),
+            expected)
+        self.assertEqual(
+            PackedKnownMatrix.from_edges(
+                21, edges, block_edges = 5).packed.tolist(),
+            expected)
+        self.assertEqual(
+            PackedKnownMatrix.from_edges(0, []).packed.shape, (0, 0))
+
+    @unittest.skipIf(numpy is None, 'NumPy not available')
+    def test_packed_matrix_knows(self):
+        known_matrix = make_party(11, 3, seed = 11)
+        matrix = PackedKnownMatrix.from_lists(known_matrix)
+
+        for person in range(11):
+            for other in range(11):
+                self.assertEqual(
+                    matrix.knows(person, other),
+                    knows_matrix(person, other, known_matrix))
+
+    @unittest.skipIf(numpy is None, 'NumPy not available')
+    def test_packed_matrix_save_load(self):
+        matrix = PackedKnownMatrix.from_lists(make_party(30, 7))
+        (fd, path) = tempfile.mkstemp(suffix = '.npy')
+        os.close(fd)
+
+        try:
+            matrix.save(path)
+            loaded = PackedKnownMatrix.load(path)
+
+            self.assertEqual(len(loaded), 30)
+            self.assertEqual(find_celebrity_vectorized(loaded), 7)
+            self.assertEqual(loaded.packed.tolist(), matrix.packed.tolist())
+            del loaded
+        finally:
+            os.remove(path)
+
+    def test_oracle_memoizes(self):
+        knows = KnowsOracle(lambda person_1, person_2: person_2 == 0)
+
+        self.assertTrue(knows(1, 0))
+        self.assertTrue(knows(1, 0))
+        self.assertFalse(knows(0, 1))
+        self.assertEqual(knows.num_calls, 3)
+        self.assertEqual(knows.num_queries, 2)
+
 
 if __name__ == '__main__':
-    unittest.main(verbosity = 2)
+    if len(sys.argv) > 1:
+        parties = {
+            'celebrity': lambda n: make_party(n, n // 2),
+            'strangers': lambda n: make_party(n, None, knows_rate = 0),
+        }
+
+        for num_people in map(int, sys.argv[1:]):
+            for party, make in parties.items():
+                known_matrix = make(num_people)
+
+                for find_impl in sorted(
+                        Test.find_impls, key = lambda f: f.__name__):
+
+                    print('%8d  %-10s %-28s %10d queries' % (
+                        num_people,
+                        party,
+                        find_impl.__name__,
+                        count_queries(find_impl, known_matrix)))
+    else:
+        unittest.main(verbosity = 2)
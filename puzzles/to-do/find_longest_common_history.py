@@ -5,13 +5,33 @@
 Find the longest common contiguous sequence of URLs between two users' browsing
 history. Each user's history is in chronological order, and no URL was visited
 more than once.
+
+Also finds the longest common contiguous history among many users, either
+over every pair of users or between one user and everyone else.
 """
 
-from typing import List
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple, TypeVar
+from multiprocessing.sharedctypes import Synchronized
+import collections
+import itertools
+import multiprocessing
+import random
 import unittest
 
 
-def find_contiguous_history(urls_a: List[str], urls_b: List[str]) -> List[str]:
+T = TypeVar('T')
+
+# Pair of users, start in the first user's history, and length.
+CommonRun = Tuple[Tuple[int, int], int, int]
+
+# Pair of users, if any, and their URLs in common.
+CommonHistory = Tuple[Optional[Tuple[int, int]], List[str]]
+
+
+def find_contiguous_history_by_rescan(
+        urls_a: List[str],
+        urls_b: List[str]) -> List[str]:
+
     """
     Time: O(m * n), where m=number of A URLs, n=number of B URLs
     Space: O(max(m, n)), ditto
@@ -47,7 +67,270 @@ def find_contiguous_history(urls_a: List[str], urls_b: List[str]) -> List[str]:
     return longest_common_seq
 
 
-class Test(unittest.TestCase):
+def find_contiguous_history_by_offset(
+        urls_a: List[str],
+        urls_b: List[str]) -> List[str]:
+
+    """
+    A common run is consecutive A URLs whose B indexes are also consecutive,
+    i.e. at the same offset. Since no URL repeats, each A URL is in at most
+    one run, so runs are grown in a single pass instead of being rescanned
+    from every start.
+
+    Time: O(m + n), where m=number of A URLs, n=number of B URLs
+    Space: O(n), ditto
+    """
+
+    url_b_to_index = {url_b: index for index, url_b in enumerate(urls_b)}
+    (start_a, length) = find_common_run(urls_a, url_b_to_index)
+    return urls_a[start_a:start_a + length]
+
+
+def find_common_run(
+        items_a: Sequence[T],
+        item_b_to_index: Dict[T, int]) -> Tuple[int, int]:
+
+    """
+    Start in A and length of the first longest common run, growing each run
+    while the B index of the next A item is the one that follows.
+
+    Time: O(m), where m=number of A items
+    Space: O(1)
+    """
+
+    (longest_start_a, longest_length) = (0, 0)
+    (start_a, length) = (0, 0)
+    prev_index_b = -1
+
+    for index_a, item_a in enumerate(items_a):
+        index_b = item_b_to_index.get(item_a)
+
+        if index_b is None:
+            length = 0
+            continue
+
+        if (length > 0) and (index_b == prev_index_b + 1):
+            length += 1
+        else:
+            (start_a, length) = (index_a, 1)
+
+        prev_index_b = index_b
+
+        if length > longest_length:
+            (longest_start_a, longest_length) = (start_a, length)
+
+    return (longest_start_a, longest_length)
+
+
+find_contiguous_history = find_contiguous_history_by_offset
+
+
+class HistoryIndex:
+    """
+    Histories of many users, with URLs interned to integer IDs once, the
+    position of each URL ID per user, so that comparing two users hashes
+    small integers instead of URL strings, and the users of each URL ID, to
+    count how many URLs a user shares with everyone else at once.
+    """
+
+    def __init__(self, histories: Sequence[List[str]]):
+        url_to_id: Dict[str, int] = {}
+        self.urls: List[str] = []
+        self.histories: List[List[int]] = []
+
+        for urls in histories:
+            url_ids = []
+
+            for url in urls:
+                url_id = url_to_id.get(url)
+
+                if url_id is None:
+                    url_id = url_to_id[url] = len(self.urls)
+                    self.urls.append(url)
+
+                url_ids.append(url_id)
+
+            self.histories.append(url_ids)
+
+        self.positions: List[Dict[int, int]] = [
+            {url_id: position for position, url_id in enumerate(url_ids)}
+            for url_ids in self.histories]
+
+        self.users_by_url_id: List[List[int]] = [[] for _ in self.urls]
+
+        for user, url_ids in enumerate(self.histories):
+            for url_id in url_ids:
+                self.users_by_url_id[url_id].append(user)
+
+    def compare(
+            self,
+            user: int,
+            others: List[int],
+            best_length: Synchronized) -> Optional[CommonRun]:
+
+        """
+        Longest common run between a user and others, sorted by decreasing
+        history length, that's at least as long as the shared
+        `best_length.value`, which is raised as longer runs are found.
+        Pairs that can't reach it are skipped: first by history length,
+        which stops the search, and then by number of shared URLs. Ties are
+        broken in favor of the lowest pair of users.
+
+        Time: O(s + k * l), where s=number of users sharing each of the
+            user's URLs, summed, k=number of others, l=max history length
+        Space: O(s)
+        """
+
+        best: Optional[CommonRun] = None
+        shared_count_per_user: Dict[int, int] = collections.Counter()
+        user_length = len(self.histories[user])
+
+        for url_id in self.histories[user]:
+            shared_count_per_user.update(self.users_by_url_id[url_id])
+
+        # Reading the shared value takes a lock, so it's only refreshed
+        # after each comparison.
+        min_length = max(best_length.value, 1)
+
+        for other in others:
+            if min(user_length, len(self.histories[other])) < min_length:
+                break
+
+            if shared_count_per_user.get(other, 0) < min_length:
+                continue
+
+            (user_a, user_b) = (min(user, other), max(user, other))
+            (start_a, length) = find_common_run(
+                self.histories[user_a], self.positions[user_b])
+
+            if length >= min_length:
+                run = ((user_a, user_b), start_a, length)
+
+                if (best is None) or is_better_run(run, best):
+                    best = run
+
+                with best_length.get_lock():
+                    best_length.value = max(best_length.value, length)
+
+            min_length = max(best_length.value, 1)
+
+        return best
+
+    def find_urls(self, run: CommonRun) -> List[str]:
+        ((user_a, _), start_a, length) = run
+
+        return [self.urls[url_id]
+            for url_id in self.histories[user_a][start_a:start_a + length]]
+
+
+def is_better_run(run: CommonRun, other_run: CommonRun) -> bool:
+    (pair, _, length) = run
+    (other_pair, _, other_length) = other_run
+
+    return (length > other_length) \
+        or ((length == other_length) and (pair < other_pair))
+
+
+def split_comparisons(
+        index: HistoryIndex,
+        user: Optional[int],
+        chunk_size: int) -> Iterator[Tuple[int, List[int]]]:
+
+    """
+    Yields a user and a chunk of others to compare against, with users in
+    order of decreasing history length, so that the longest potential runs
+    are found first, and every pair is compared once.
+    """
+
+    order = sorted(range(len(index.histories)),
+        key=lambda each: len(index.histories[each]),
+        reverse=True)
+
+    if user is not None:
+        others = [other for other in order if other != user]
+        comparisons = [(user, others)]
+    else:
+        comparisons = ((order[i], order[i + 1:]) for i in range(len(order)))
+
+    for (each, others) in comparisons:
+        for start in range(0, len(others), chunk_size):
+            yield (each, others[start:start + chunk_size])
+
+
+worker_index: Optional[HistoryIndex] = None
+worker_best_length: Optional[Synchronized] = None
+
+
+def init_worker(index: HistoryIndex, best_length: Synchronized) -> None:
+    global worker_index, worker_best_length
+    (worker_index, worker_best_length) = (index, best_length)
+
+
+def compare_in_worker(comparison: Tuple[int, List[int]]) \
+        -> Optional[CommonRun]:
+
+    assert worker_index is not None
+    assert worker_best_length is not None
+    return worker_index.compare(*comparison, worker_best_length)
+
+
+def find_longest_common_history_among(
+        histories: Sequence[List[str]],
+        user: Optional[int] = None,
+        processes: Optional[int] = 1,
+        chunk_size: int = 1000) -> CommonHistory:
+
+    """
+    Longest common contiguous history over every pair of users, or between
+    `user` and every other user if given, along with the pair of users (or
+    none if nobody has any URL in common). Unless `processes` is 1, pairs
+    are compared across a process pool, as large as the number of CPUs if
+    none, sharing the best length found so far, to skip pairs that can't
+    beat it.
+
+    Time: O(t + (p * l) / c), where t=total URLs, p=number of pairs,
+        l=max history length, c=processes -- worst-case, before pruning
+    Space: O(t)
+    """
+
+    index = HistoryIndex(histories)
+    best_length = multiprocessing.Value('q', 0)
+    comparisons = split_comparisons(index, user, chunk_size)
+
+    if processes == 1:
+        runs: Iterator[Optional[CommonRun]] = (
+            index.compare(*comparison, best_length)
+            for comparison in comparisons)
+        best = find_best_run(runs)
+    else:
+        with multiprocessing.Pool(
+                processes,
+                initializer=init_worker,
+                initargs=(index, best_length)) as pool:
+
+            best = find_best_run(
+                pool.imap_unordered(compare_in_worker, comparisons))
+
+    if best is None:
+        return (None, [])
+
+    return (best[0], index.find_urls(best))
+
+
+def find_best_run(runs: Iterator[Optional[CommonRun]]) -> Optional[CommonRun]:
+    best: Optional[CommonRun] = None
+
+    for run in runs:
+        if (run is not None) and ((best is None) or is_better_run(run, best)):
+            best = run
+
+    return best
+
+
+class BaseTestCase(unittest.TestCase):
+    impl = None
+    find_contiguous_history = property(lambda self: self.impl)
+
     user0 = ["/start", "/green", "/blue", "/pink", "/register", "/orange",
         "/one/two"]
     user1 = ["/start", "/pink", "/register", "/orange", "/red", "a"]
@@ -62,42 +345,147 @@ class Test(unittest.TestCase):
     user6 = ["/pink", "/orange", "/six", "/plum", "/seven", "/tan", "/red",
         "/amber"]
 
+    @classmethod
+    def setUpClass(cls):
+        if cls.impl is None:
+            raise unittest.SkipTest(cls.__name__)
+
     def test_empty_history(self):
-        self.assertEqual(find_contiguous_history([], []), [])
+        self.assertEqual(self.find_contiguous_history([], []), [])
 
     def test_case_user0_user1(self):
-        self.assertEqual(find_contiguous_history(self.user0, self.user1),
+        self.assertEqual(self.find_contiguous_history(self.user0, self.user1),
             ["/pink", "/register", "/orange"])
 
     def test_case_user0_user2(self):
-        self.assertEqual(find_contiguous_history(self.user0, self.user2),
+        self.assertEqual(self.find_contiguous_history(self.user0, self.user2),
             [])
 
     def test_case_user0_user0(self):
-        self.assertEqual(find_contiguous_history(self.user0, self.user0),
+        self.assertEqual(self.find_contiguous_history(self.user0, self.user0),
             ["/start", "/green", "/blue", "/pink", "/register", "/orange",
                 "/one/two"])
 
     def test_case_user2_user1(self):
-        self.assertEqual(find_contiguous_history(self.user2, self.user1),
+        self.assertEqual(self.find_contiguous_history(self.user2, self.user1),
             ["a"])
 
     def test_case_user5_user2(self):
-        self.assertEqual(find_contiguous_history(self.user5, self.user2),
+        self.assertEqual(self.find_contiguous_history(self.user5, self.user2),
             ["a"])
 
     def test_case_user3_user4(self):
-        self.assertEqual(find_contiguous_history(self.user3, self.user4),
+        self.assertEqual(self.find_contiguous_history(self.user3, self.user4),
             ["/plum", "/blue", "/tan", "/red"])
 
     def test_case_user4_user3(self):
-        self.assertEqual(find_contiguous_history(self.user4, self.user3),
+        self.assertEqual(self.find_contiguous_history(self.user4, self.user3),
             ["/plum", "/blue", "/tan", "/red"])
 
     def test_case_user3_user6(self):
-        self.assertEqual(find_contiguous_history(self.user3, self.user6),
+        self.assertEqual(self.find_contiguous_history(self.user3, self.user6),
             ["/tan", "/red", "/amber"])
 
+    def test_adjacent_runs(self):
+        self.assertEqual(
+            self.find_contiguous_history(
+                ["a", "b", "c", "d", "e"], ["d", "e", "a", "b", "c"]),
+            ["a", "b", "c"])
+
+
+class TestCaseByRescan(BaseTestCase):
+    impl = staticmethod(find_contiguous_history_by_rescan)
+
+class TestCaseByOffset(BaseTestCase):
+    impl = staticmethod(find_contiguous_history_by_offset)
+
+    def test_matches_rescan(self):
+        rand = random.Random(0)
+        urls = ["/%d" % i for i in range(20)]
+
+        for _ in range(500):
+            urls_a = rand.sample(urls, rand.randint(0, len(urls)))
+            urls_b = rand.sample(urls, rand.randint(0, len(urls)))
+
+            # Share a run more often than random samples would.
+            if rand.random() < 0.5:
+                start = rand.randint(0, len(urls_a))
+                run = urls_a[start:rand.randint(start, len(urls_a))]
+                rest = [url for url in urls_b if url not in run]
+                position = rand.randint(0, len(rest))
+                urls_b = rest[:position] + run + rest[position:]
+
+            self.assertEqual(
+                self.find_contiguous_history(urls_a, urls_b),
+                find_contiguous_history_by_rescan(urls_a, urls_b))
+
+
+class TestAmong(unittest.TestCase):
+    users = [BaseTestCase.user0, BaseTestCase.user1, BaseTestCase.user2,
+        BaseTestCase.user3, BaseTestCase.user4, BaseTestCase.user5,
+        BaseTestCase.user6]
+
+    def find_by_rescan(
+            self,
+            histories: List[List[str]],
+            user: Optional[int] = None) -> CommonHistory:
+
+        best: CommonHistory = (None, [])
+        pairs = itertools.combinations(range(len(histories)), 2)
+
+        for (user_a, user_b) in pairs:
+            if (user is not None) and (user not in (user_a, user_b)):
+                continue
+
+            urls = find_contiguous_history_by_rescan(
+                histories[user_a], histories[user_b])
+
+            if len(urls) > len(best[1]):
+                best = ((user_a, user_b), urls)
+
+        return best
+
+    def test_no_users(self):
+        self.assertEqual(find_longest_common_history_among([]), (None, []))
+
+    def test_nothing_in_common(self):
+        self.assertEqual(
+            find_longest_common_history_among([["a"], ["b"], []]),
+            (None, []))
+
+    def test_every_pair(self):
+        self.assertEqual(find_longest_common_history_among(self.users),
+            ((3, 4), ["/plum", "/blue", "/tan", "/red"]))
+
+    def test_one_user(self):
+        self.assertEqual(find_longest_common_history_among(self.users, 6),
+            ((3, 6), ["/tan", "/red", "/amber"]))
+        self.assertEqual(find_longest_common_history_among(self.users, 2),
+            ((1, 2), ["a"]))
+
+    def test_matches_rescan(self):
+        rand = random.Random(0)
+        urls = ["/%d" % i for i in range(30)]
+
+        for _ in range(50):
+            histories = [rand.sample(urls, rand.randint(0, 15))
+                for _ in range(rand.randint(0, 8))]
+
+            for user in [None] + list(range(len(histories))):
+                self.assertEqual(
+                    find_longest_common_history_among(
+                        histories, user, chunk_size=3),
+                    self.find_by_rescan(histories, user))
+
+    def test_processes(self):
+        histories = [["/%d" % i for i in range(start, start + 50)]
+            for start in range(0, 500, 20)]
+
+        self.assertEqual(
+            find_longest_common_history_among(
+                histories, processes=2, chunk_size=2),
+            find_longest_common_history_among(histories))
+
 
 if __name__ == '__main__':
     unittest.main(verbosity=2)